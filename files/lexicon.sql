@@ -17,13 +17,22 @@ CREATE TABLE IF NOT EXISTS `graph` (
 
 CREATE TABLE IF NOT EXISTS `words` (
   `id` int(10) unsigned NOT NULL AUTO_INCREMENT,
-  `word` text COLLATE utf8_bin NOT NULL,
+  `word` varchar(255) COLLATE utf8_bin NOT NULL,
+  `first_char` char(1) COLLATE utf8_bin NOT NULL DEFAULT '',
   `frequency` float unsigned NOT NULL,
   `length` tinyint(3) unsigned NOT NULL,
   PRIMARY KEY (`id`),
-  UNIQUE KEY `id` (`id`)
+  UNIQUE KEY `id` (`id`),
+  UNIQUE KEY `word` (`word`),
+  KEY `first_char_length` (`first_char`,`length`)
 ) ENGINE=InnoDB  DEFAULT CHARSET=utf8 COLLATE=utf8_bin AUTO_INCREMENT=458585 ;
 
+CREATE TABLE IF NOT EXISTS `schema_version` (
+  `version` int(10) unsigned NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+INSERT INTO `schema_version` (`version`) VALUES (2);
+
 
 ALTER TABLE `graph`
   ADD CONSTRAINT `graph_ibfk_2` FOREIGN KEY (`word2`) REFERENCES `words` (`id`) ON DELETE CASCADE ON UPDATE CASCADE,
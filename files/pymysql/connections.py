@@ -19,6 +19,9 @@ import struct
 import sys
 import os
 import configparser
+import datetime
+from collections import OrderedDict
+from functools import partial
 
 try:
     import io as StringIO
@@ -38,7 +41,9 @@ from .constants import SERVER_STATUS
 from .constants.CLIENT import *
 from .constants.COMMAND import *
 from .util import join_bytes, byte2int, int2byte
-from .converters import escape_item, encoders, decoders
+from .converters import escape_item, escape_timedelta, encoders, decoders
+from .converters import convert_int, convert_long, convert_float, \
+        convert_characters
 from .err import raise_mysql_exception, Warning, Error, \
      InterfaceError, DataError, DatabaseError, OperationalError, \
      IntegrityError, InternalError, NotSupportedError, ProgrammingError
@@ -55,6 +60,9 @@ UNSIGNED_SHORT_LENGTH = 2
 UNSIGNED_INT24_LENGTH = 3
 UNSIGNED_INT64_LENGTH = 8
 
+# Initial size of a connection's packet receive buffer.
+RECV_BUFFER_SIZE = 16384
+
 DEFAULT_CHARSET = 'latin1'
 
 
@@ -199,10 +207,281 @@ def defaulterrorhandler(connection, cursor, errorclass, errorvalue):
         raise errorclass(errorvalue)
 
 
+def pack_length_coded_binary(n):
+    """Encode an unsigned integer as a 'Length Coded Binary'."""
+    if n < UNSIGNED_CHAR_COLUMN:
+        return int2byte(n)
+    elif n < (1 << 16):
+        return int2byte(UNSIGNED_SHORT_COLUMN) + struct.pack('<H', n)
+    elif n < (1 << 24):
+        return int2byte(UNSIGNED_INT24_COLUMN) + pack_int24(n)
+    else:
+        return int2byte(UNSIGNED_INT64_COLUMN) + struct.pack('<Q', n)
+
+def read_length_coded_binary(data, pos):
+    """Read a 'Length Coded Binary' at pos.  Return (value, new pos)."""
+    c = data[pos]
+    if c < UNSIGNED_CHAR_COLUMN:
+        return c, pos + 1
+    if c == NULL_COLUMN:
+        return None, pos + 1
+    if c == UNSIGNED_SHORT_COLUMN:
+        return struct.unpack_from('<H', data, pos + 1)[0], pos + 3
+    if c == UNSIGNED_INT24_COLUMN:
+        return (struct.unpack_from('<H', data, pos + 1)[0]
+                + (data[pos + 3] << 16)), pos + 4
+    return struct.unpack_from('<Q', data, pos + 1)[0], pos + 9
+
+def pack_binary_params(args, charset):
+    """Encode the parameter block of a COM_STMT_EXECUTE packet.
+
+    Integers are sent as LONGLONG, floats as DOUBLE and everything else
+    as strings: str and bytes as they are, timedeltas as 'HH:MM:SS' and
+    other objects (dates, Decimal) as str(obj).
+    """
+    null_bitmap = bytearray((len(args) + 7) // 8)
+    types = []
+    values = []
+    for i, arg in enumerate(args):
+        if arg is None:
+            null_bitmap[i >> 3] |= 1 << (i & 7)
+            types.append(struct.pack('<BB', FIELD_TYPE.NULL, 0))
+        elif isinstance(arg, int):
+            if arg > 0x7fffffffffffffff:
+                types.append(struct.pack('<BB', FIELD_TYPE.LONGLONG, 0x80))
+                values.append(struct.pack('<Q', arg))
+            else:
+                types.append(struct.pack('<BB', FIELD_TYPE.LONGLONG, 0))
+                values.append(struct.pack('<q', arg))
+        elif isinstance(arg, float):
+            types.append(struct.pack('<BB', FIELD_TYPE.DOUBLE, 0))
+            values.append(struct.pack('<d', arg))
+        else:
+            if isinstance(arg, str):
+                data = arg.encode(charset)
+            elif isinstance(arg, (bytes, bytearray)):
+                data = bytes(arg)
+            elif isinstance(arg, datetime.timedelta):
+                data = escape_timedelta(arg)[1:-1].encode(charset)
+            else:
+                data = str(arg).encode(charset)
+            types.append(struct.pack('<BB', FIELD_TYPE.VAR_STRING, 0))
+            values.append(pack_length_coded_binary(len(data)) + data)
+    return bytes(null_bitmap) + int2byte(1) + b''.join(types) + b''.join(values)
+
+_BINARY_INTS = {
+    FIELD_TYPE.TINY: 'b',
+    FIELD_TYPE.SHORT: 'h',
+    FIELD_TYPE.YEAR: 'h',
+    FIELD_TYPE.INT24: 'i',
+    FIELD_TYPE.LONG: 'i',
+    FIELD_TYPE.LONGLONG: 'q',
+    }
+
+def _no_converter(data):
+    return None
+
+def text_converter(connection, field):
+    """Return a function converting one text protocol value of field.
+
+    The stock integer, float and string converters are replaced by the
+    builtins they amount to.  Fields without a converter come out as
+    None, as they always have.
+    """
+    converter = connection.decoders.get(field.type_code)
+    if converter is None:
+        return _no_converter
+    if converter is convert_int or converter is convert_long:
+        return int
+    if converter is convert_float:
+        return float
+    if converter is convert_characters and not field.flags & FLAG.SET:
+        if field.flags & FLAG.BINARY:
+            return bytes
+        if connection.use_unicode:
+            return partial(str, encoding=charset_by_id(field.charsetnr).name)
+    return partial(converter, connection, field)
+
+def text_row_decoder(connection, fields):
+    """Return a function decoding a text protocol row from its payload.
+
+    Converters are resolved once per result set.  Rows of an integer
+    and a binary string, like (id, word), get their own loop.
+    """
+    converters = [text_converter(connection, field) for field in fields]
+
+    def decode_row(data):
+        row = []
+        pos = 0
+        for convert in converters:
+            length = data[pos]
+            if length < UNSIGNED_CHAR_COLUMN:
+                pos += 1
+            elif length == NULL_COLUMN:
+                row.append(None)
+                pos += 1
+                continue
+            else:
+                length, pos = read_length_coded_binary(data, pos)
+            end = pos + length
+            row.append(convert(bytes(data[pos:end])))
+            pos = end
+        return tuple(row)
+
+    def decode_int_bytes(data):
+        length = data[0]
+        if length >= UNSIGNED_CHAR_COLUMN:
+            return decode_row(data)
+        pos = length + 1
+        size = data[pos]
+        if size >= UNSIGNED_CHAR_COLUMN:
+            return decode_row(data)
+        pos += 1
+        return int(bytes(data[1:length + 1])), bytes(data[pos:pos + size])
+
+    if (len(converters) == 2 and converters[0] is int
+            and converters[1] is bytes):
+        return decode_int_bytes
+    return decode_row
+
+def binary_decoder(connection, field):
+    """Return a function decoding one binary protocol value of field.
+
+    The function takes (data, pos) and returns (value, new pos).
+    Numbers and temporal types are decoded from their binary form;
+    other types are length coded strings passed to the connection's
+    text decoders, so they come out as they would from a text query.
+    """
+    type_code = field.type_code
+    if type_code in _BINARY_INTS:
+        code = _BINARY_INTS[type_code]
+        if field.flags & FLAG.UNSIGNED:
+            code = code.upper()
+        unpack = struct.Struct('<' + code)
+        size = unpack.size
+        def decode(data, pos):
+            return unpack.unpack_from(data, pos)[0], pos + size
+    elif type_code == FIELD_TYPE.FLOAT:
+        def decode(data, pos):
+            # MySQL prints FLOAT with 6 significant digits; round the
+            # same way so both protocols give the same values.
+            value = struct.unpack_from('<f', data, pos)[0]
+            return float('%.6g' % value), pos + 4
+    elif type_code == FIELD_TYPE.DOUBLE:
+        def decode(data, pos):
+            return struct.unpack_from('<d', data, pos)[0], pos + 8
+    elif type_code in (FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE,
+                       FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+        is_date = type_code in (FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE)
+        def decode(data, pos):
+            length = data[pos]
+            pos += 1
+            if length == 0:
+                return None, pos
+            year, month, day = struct.unpack_from('<HBB', data, pos)
+            hour = minute = second = microsecond = 0
+            if length >= 7:
+                hour, minute, second = struct.unpack_from('<BBB', data, pos + 4)
+            if length >= 11:
+                microsecond = struct.unpack_from('<I', data, pos + 7)[0]
+            try:
+                if is_date:
+                    value = datetime.date(year, month, day)
+                else:
+                    value = datetime.datetime(year, month, day, hour, minute,
+                                              second, microsecond)
+            except ValueError:
+                value = None
+            return value, pos + length
+    elif type_code == FIELD_TYPE.TIME:
+        def decode(data, pos):
+            length = data[pos]
+            pos += 1
+            if length == 0:
+                return datetime.timedelta(0), pos
+            negative, days, hour, minute, second = struct.unpack_from(
+                '<BIBBB', data, pos)
+            microsecond = 0
+            if length >= 12:
+                microsecond = struct.unpack_from('<I', data, pos + 8)[0]
+            value = datetime.timedelta(days=days, hours=hour, minutes=minute,
+                                       seconds=second,
+                                       microseconds=microsecond)
+            return (-value if negative else value), pos + length
+    else:
+        if type_code in connection.decoders:
+            convert = text_converter(connection, field)
+        else:
+            convert = bytes
+        def decode(data, pos):
+            length, pos = read_length_coded_binary(data, pos)
+            end = pos + length
+            return convert(bytes(data[pos:end])), end
+        decode.convert = convert
+    return decode
+
+def binary_row_decoder(connection, fields):
+    """Return a function decoding a binary protocol row from its payload.
+
+    Each row is a 0x00 header, a NULL bitmap with a two bit offset, and
+    the non-NULL values in binary form.  Rows of an integer and a binary
+    string, like (id, word), get their own loop.
+    """
+    decoders = [binary_decoder(connection, field) for field in fields]
+    bitmap_end = 1 + (len(decoders) + 9) // 8
+
+    def decode_row(data):
+        pos = bitmap_end
+        row = []
+        for i, decode in enumerate(decoders):
+            bit = i + 2
+            if data[1 + (bit >> 3)] & (1 << (bit & 7)):
+                row.append(None)
+            else:
+                value, pos = decode(data, pos)
+                row.append(value)
+        return tuple(row)
+
+    if (len(fields) == 2 and fields[0].type_code in _BINARY_INTS
+            and getattr(decoders[1], 'convert', None) is bytes):
+        code = _BINARY_INTS[fields[0].type_code]
+        if fields[0].flags & FLAG.UNSIGNED:
+            code = code.upper()
+        unpack = struct.Struct('<' + code)
+        unpack_from = unpack.unpack_from
+        start = bitmap_end + unpack.size
+
+        def decode_int_bytes(data):
+            # Bits 2 and 3 of the bitmap flag the two columns as NULL.
+            if data[1] & 0x0c or data[start] >= UNSIGNED_CHAR_COLUMN:
+                return decode_row(data)
+            pos = start + 1
+            return (unpack_from(data, bitmap_end)[0],
+                    bytes(data[pos:pos + data[start]]))
+        return decode_int_bytes
+    return decode_row
+
+
+def _read_into(rfile, view):
+  """Fill a memoryview from a file, or raise OperationalError at EOF."""
+  size = len(view)
+  got = 0
+  while got < size:
+    n = rfile.readinto(view[got:])
+    if not n:
+      raise OperationalError(2013, "Lost connection to MySQL server during query")
+    got += n
+
 class MysqlPacket(object):
   """Representation of a MySQL response packet.  Reads in the packet
   from the network socket, removes packet header and provides an interface
-  for reading/parsing the packet results."""
+  for reading/parsing the packet results.
+
+  The payload is read into a buffer owned by the connection and reused
+  for the next packet, and parsed through a memoryview of it.  Values
+  are copied out as bytes only when they are returned, so a packet must
+  be used up before the next packet is read from the connection.
+  """
 
   def __init__(self, connection):
     self.connection = connection
@@ -211,31 +490,38 @@ class MysqlPacket(object):
 
   def __recv_packet(self):
     """Parse the packet header and read entire packet payload into buffer."""
-    packet_header = self.connection.rfile.read(4)
-    if len(packet_header) < 4:
-        raise OperationalError(2013, "Lost connection to MySQL server during query")
-
-    if DEBUG: dump_packet(packet_header)
-    packet_length_bin = packet_header[:3]
-    self.__packet_number = byte2int(packet_header[3])
+    connection = self.connection
+    buf = connection._recv_buf
+    if buf is None:
+      buf = connection._recv_buf = bytearray(RECV_BUFFER_SIZE)
+    _read_into(connection.rfile, memoryview(buf)[:4])
+    if DEBUG: dump_packet(bytes(buf[:4]))
+    bytes_to_read = buf[0] | (buf[1] << 8) | (buf[2] << 16)
+    self.__packet_number = buf[3]
     # TODO: check packet_num is correct (+1 from last packet)
 
-    bin_length = packet_length_bin + int2byte(0)  # pad little-endian number
-    bytes_to_read = struct.unpack('<I', bin_length)[0]
-    recv_data = self.connection.rfile.read(bytes_to_read)
-    if len(recv_data) < bytes_to_read:
-        raise OperationalError(2013, "Lost connection to MySQL server during query")
-    if DEBUG: dump_packet(recv_data)
-    self.__data = recv_data
+    if bytes_to_read + 4 > len(buf):
+      # Replace rather than resize the buffer: views of the old one may
+      # still be alive.
+      buf = connection._recv_buf = bytearray(
+          max(bytes_to_read + 4, 2 * len(buf)))
+    view = memoryview(buf)[4:4 + bytes_to_read]
+    _read_into(connection.rfile, view)
+    if DEBUG: dump_packet(bytes(view))
+    self.__data = view
 
   def packet_number(self): return self.__packet_number
 
-  def get_all_data(self): return self.__data
+  def get_all_data(self): return bytes(self.__data)
+
+  def get_data_view(self):
+    """Return a memoryview of the payload, valid until the next packet."""
+    return self.__data
 
   def read(self, size):
     """Read the first 'size' bytes in packet and advance cursor past them."""
     result = self.peek(size)
-    self.advance(size)
+    self.__position += size
     return result
 
   def read_all(self):
@@ -243,7 +529,7 @@ class MysqlPacket(object):
 
     (Subsequent read() or peek() will return errors.)
     """
-    result = self.__data[self.__position:]
+    result = bytes(self.__data[self.__position:])
     self.__position = None  # ensure no subsequent read() or peek()
     return result
 
@@ -263,16 +549,20 @@ class MysqlPacket(object):
 
   def peek(self, size):
     """Look at the first 'size' bytes in packet without moving cursor."""
-    result = self.__data[self.__position:(self.__position+size)]
-    if len(result) != size:
-      error = ('Result length not requested length:\n'
-               'Expected=%s.  Actual=%s.  Position: %s.  Data Length: %s'
-               % (size, len(result), self.__position, len(self.__data)))
-      if DEBUG:
-        print(error)
-        self.dump()
-      raise AssertionError(error)
-    return result
+    end = self.__position + size
+    if end > len(self.__data):
+      self.__short_read(size)
+    return bytes(self.__data[self.__position:end])
+
+  def __short_read(self, size):
+    error = ('Result length not requested length:\n'
+             'Expected=%s.  Actual=%s.  Position: %s.  Data Length: %s'
+             % (size, max(len(self.__data) - self.__position, 0),
+                self.__position, len(self.__data)))
+    if DEBUG:
+      print(error)
+      self.dump()
+    raise AssertionError(error)
 
   def get_bytes(self, position, length=1):
     """Get 'length' bytes starting at 'position'.
@@ -283,7 +573,7 @@ class MysqlPacket(object):
     No error checking is done.  If requesting outside end of buffer
     an empty string (or string shorter than 'length') may be returned!
     """
-    return self.__data[position:(position+length)]
+    return bytes(self.__data[position:(position+length)])
 
   def read_length_coded_binary(self):
     """Read a 'Length Coded Binary' number from the data buffer.
@@ -291,18 +581,19 @@ class MysqlPacket(object):
     Length coded numbers can be anywhere from 1 to 9 bytes depending
     on the value of the first byte.
     """
-    c = byte2int(self.read(1))
-    if c == NULL_COLUMN:
-      return None
+    data = self.__data
+    pos = self.__position
+    if pos >= len(data):
+      self.__short_read(1)
+    c = data[pos]
     if c < UNSIGNED_CHAR_COLUMN:
+      self.__position = pos + 1
       return c
-    elif c == UNSIGNED_SHORT_COLUMN:
-      return unpack_uint16(self.read(UNSIGNED_SHORT_LENGTH))
-    elif c == UNSIGNED_INT24_COLUMN:
-      return unpack_int24(self.read(UNSIGNED_INT24_LENGTH))
-    elif c == UNSIGNED_INT64_COLUMN:
-      # TODO: what was 'longlong'?  confirm it wasn't used?
-      return unpack_int64(self.read(UNSIGNED_INT64_LENGTH))
+    if c == NULL_COLUMN:
+      self.__position = pos + 1
+      return None
+    value, self.__position = read_length_coded_binary(data, pos)
+    return value
 
   def read_length_coded_string(self):
     """Read a 'Length Coded String' from the data buffer.
@@ -317,17 +608,17 @@ class MysqlPacket(object):
     return self.read(length)
 
   def is_ok_packet(self):
-    return byte2int(self.get_bytes(0)) == 0
+    return self.__data[0] == 0
 
   def is_eof_packet(self):
-    return byte2int(self.get_bytes(0)) == 254  # 'fe'
+    return self.__data[0] == 254  # 'fe'
 
   def is_resultset_packet(self):
-    field_count = byte2int(self.get_bytes(0))
+    field_count = self.__data[0]
     return field_count >= 1 and field_count <= 250
 
   def is_error_packet(self):
-    return byte2int(self.get_bytes(0)) == 255
+    return self.__data[0] == 255
 
   def check_error(self):
     if self.is_error_packet():
@@ -335,10 +626,10 @@ class MysqlPacket(object):
       self.advance(1)  # field_count == error (we already know that)
       errno = unpack_uint16(self.read(2))
       if DEBUG: print("errno = %d" % errno)
-      raise_mysql_exception(self.__data)
+      raise_mysql_exception(self.get_all_data())
 
   def dump(self):
-    dump_packet(self.__data)
+    dump_packet(self.get_all_data())
 
 
 class FieldDescriptorPacket(MysqlPacket):
@@ -404,6 +695,41 @@ class FieldDescriptorPacket(MysqlPacket):
                self.type_code))
 
 
+class PreparedStatement(object):
+    """A server-side prepared statement.
+
+    Made by Connection.prepare(), which reads the COM_STMT_PREPARE
+    response: the statement id and counts, then the parameter and column
+    definitions.
+    """
+
+    def __init__(self, connection, query):
+        self.query = query
+        packet = connection.read_packet()
+        packet.advance(1)  # status (always 0)
+        (self.statement_id, self.num_columns,
+         self.num_params) = struct.unpack('<IHH', packet.read(8))
+        self.params = self._read_fields(connection, self.num_params)
+        self.columns = self._read_fields(connection, self.num_columns)
+
+    @staticmethod
+    def _read_fields(connection, count):
+        fields = [connection.read_packet(FieldDescriptorPacket)
+                  for i in range(count)]
+        if count:
+            eof_packet = connection.read_packet()
+            assert eof_packet.is_eof_packet(), 'Protocol error, expecting EOF'
+        return fields
+
+    def execute_packet(self, args, charset):
+        """Return the body of a COM_STMT_EXECUTE packet for args."""
+        # flags: CURSOR_TYPE_NO_CURSOR, iteration count: 1
+        data = struct.pack('<IBI', self.statement_id, 0, 1)
+        if self.num_params:
+            data += pack_binary_params(args, charset)
+        return data
+
+
 class Connection(object):
     """
     Representation of a socket with a mysql server.
@@ -412,6 +738,12 @@ class Connection(object):
     connect()."""
     errorhandler = defaulterrorhandler
 
+    # Number of prepared statements kept open per connection.
+    max_statements = 64
+
+    # Buffer reused by MysqlPacket to receive packets.
+    _recv_buf = None
+
     def __init__(self, host="localhost", user=None, passwd="",
                  db=None, port=3306, unix_socket=None,
                  charset='', sql_mode=None,
@@ -610,20 +942,61 @@ class Connection(object):
             self.commit()
 
     # The following methods are INTERNAL USE ONLY (called from Cursor)
-    def query(self, sql):
+    def query(self, sql, unbuffered=False):
         if DEBUG:
             print("sending query: %s" % sql)
         self._execute_command(COM_QUERY, sql)
-        self._affected_rows = self._read_query_result()
+        self._affected_rows = self._read_query_result(unbuffered)
         return self._affected_rows
 
-    def next_result(self):
-        self._affected_rows = self._read_query_result()
+    def next_result(self, unbuffered=False):
+        self._affected_rows = self._read_query_result(unbuffered)
         return self._affected_rows
 
     def affected_rows(self):
         return self._affected_rows
 
+    def prepare(self, sql):
+        ''' Return a server-side prepared statement for sql.
+
+        Statements are cached per connection, so preparing the same
+        query again costs nothing.  Parameters are marked with '?'.
+        '''
+        if isinstance(sql, str):
+            sql = sql.encode(self.charset)
+        stmt = self._statements.pop(sql, None)
+        if stmt is None:
+            if DEBUG:
+                print("preparing: %s" % sql)
+            self._execute_command(COM_STMT_PREPARE, sql)
+            stmt = PreparedStatement(self, sql)
+            while len(self._statements) >= self.max_statements:
+                old_sql, old = self._statements.popitem(last=False)
+                self.close_statement(old)
+        self._statements[sql] = stmt
+        return stmt
+
+    def close_statement(self, stmt):
+        ''' Deallocate a prepared statement on the server '''
+        self._statements.pop(stmt.query, None)
+        # COM_STMT_CLOSE has no response
+        self._execute_command(COM_STMT_CLOSE,
+                              struct.pack('<I', stmt.statement_id))
+
+    def execute_prepared(self, stmt, args):
+        ''' Execute a prepared statement with a sequence of arguments '''
+        if len(args) != stmt.num_params:
+            raise ProgrammingError(
+                "statement takes %d arguments, %d given"
+                % (stmt.num_params, len(args)))
+        self._execute_command(COM_STMT_EXECUTE,
+                              stmt.execute_packet(args, self.charset))
+        result = MySQLResult(self, binary=True)
+        result.read()
+        self._result = result
+        self._affected_rows = result.affected_rows
+        return self._affected_rows
+
     def kill(self, thread_id):
         arg = struct.pack('<I', thread_id)
         try:
@@ -663,6 +1036,8 @@ class Connection(object):
             self.errorhandler(None, exc, value)
 
     def _connect(self):
+        # Prepared statements do not survive reconnecting.
+        self._statements = OrderedDict()
         try:
             if self.unix_socket and (self.host == 'localhost' or self.host == '127.0.0.1'):
                 sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
@@ -696,9 +1071,12 @@ class Connection(object):
       packet.check_error()
       return packet
 
-    def _read_query_result(self):
+    def _read_query_result(self, unbuffered=False):
         result = MySQLResult(self)
-        result.read()
+        if unbuffered:
+            result.init_unbuffered_query()
+        else:
+            result.read()
         self._result = result
         return result.affected_rows
 
@@ -723,6 +1101,11 @@ class Connection(object):
         if DEBUG: dump_packet(prelude + sql)
 
     def _execute_command(self, command, sql):
+        # The rest of an unbuffered result must be read before the
+        # server will take another command.
+        result = getattr(self, '_result', None)
+        if result is not None and result.unbuffered_active:
+            result._finish_unbuffered_query()
         self._send_command(command, sql)
         
     def _request_authentication(self):
@@ -862,9 +1245,11 @@ class Connection(object):
 #       of MysqlPacket like has been done with FieldDescriptorPacket.
 class MySQLResult(object):
 
-    def __init__(self, connection):
+    def __init__(self, connection, binary=False):
         from weakref import proxy
         self.connection = proxy(connection)
+        self.binary = binary
+        self.unbuffered_active = False
         self.affected_rows = None
         self.insert_id = None
         self.server_status = 0
@@ -895,39 +1280,88 @@ class MySQLResult(object):
     def _read_result_packet(self):
         self.field_count = byte2int(self.first_packet.read(1))
         self._get_descriptions()
-        self._read_rowdata_packet()
+        if self.binary:
+            self._read_binary_rowdata_packet()
+        else:
+            self._read_rowdata_packet()
+
+    def init_unbuffered_query(self):
+        """Read the start of a result, leaving the rows on the wire.
+
+        Rows are then read one at a time with _read_next_row().
+        """
+        self.unbuffered_active = True
+        self.first_packet = self.connection.read_packet()
+
+        if self.first_packet.is_ok_packet():
+            self._read_ok_packet()
+            self.unbuffered_active = False
+        else:
+            self.field_count = byte2int(self.first_packet.read(1))
+            self._get_descriptions()
+            # The row count is not known until all rows are read; this
+            # is what MySQLdb reports.
+            self.affected_rows = 18446744073709551615
+
+    def _read_next_row(self):
+        """Read one row of an unbuffered result, or None at the end."""
+        if not self.unbuffered_active:
+            return None
+        try:
+            packet = self.connection.read_packet()
+        except:
+            # An error packet also ends the result.
+            self.unbuffered_active = False
+            raise
+        if self._check_eof(packet):
+            self.unbuffered_active = False
+            return None
+        return self._read_row_from_packet(packet)
+
+    def _finish_unbuffered_query(self):
+        """Read and discard the rest of an unbuffered result."""
+        while self._read_next_row() is not None:
+            pass
+
+    def _check_eof(self, packet):
+        """If packet ends the rows, read its status and return True."""
+        if not packet.is_eof_packet():
+            return False
+        self.warning_count = packet.read(2)
+        server_status = struct.unpack('<h', packet.read(2))[0]
+        self.has_next = (server_status
+                         & SERVER_STATUS.SERVER_MORE_RESULTS_EXISTS)
+        return True
 
-    # TODO: implement this as an iteratable so that it is more
-    #       memory efficient and lower-latency to client...
     def _read_rowdata_packet(self):
       """Read a rowdata packet for each data row in the result set."""
       rows = []
       while True:
         packet = self.connection.read_packet()
-        if packet.is_eof_packet():
-            self.warning_count = packet.read(2)
-            server_status = struct.unpack('<h', packet.read(2))[0]
-            self.has_next = (server_status
-                             & SERVER_STATUS.SERVER_MORE_RESULTS_EXISTS)
+        if self._check_eof(packet):
             break
-
-        row = []
-        for field in self.fields:
-            data = packet.read_length_coded_string()
-            converted = None
-            if field.type_code in self.connection.decoders:
-                converter = self.connection.decoders[field.type_code]
-                if DEBUG: print("DEBUG: field=%s, converter=%s" % (field, converter))
-                if data != None:
-                    converted = converter(self.connection, field, data)
-            row.append(converted)
-
-        rows.append(tuple(row))
+        rows.append(self._read_row_from_packet(packet))
 
       self.affected_rows = len(rows)
       self.rows = tuple(rows)
       if DEBUG: self.rows
 
+    def _read_row_from_packet(self, packet):
+        return self._decode_row(packet.get_data_view())
+
+    def _read_binary_rowdata_packet(self):
+        """Read the rows of a prepared statement result."""
+        decode_row = binary_row_decoder(self.connection, self.fields)
+        rows = []
+        while True:
+            packet = self.connection.read_packet()
+            if self._check_eof(packet):
+                break
+            rows.append(decode_row(packet.get_data_view()))
+
+        self.affected_rows = len(rows)
+        self.rows = tuple(rows)
+
     def _get_descriptions(self):
         """Read a column descriptor packet for each column in the result."""
         self.fields = []
@@ -940,3 +1374,5 @@ class MySQLResult(object):
         eof_packet = self.connection.read_packet()
         assert eof_packet.is_eof_packet(), 'Protocol error, expecting EOF'
         self.description = tuple(description)
+        if not self.binary:
+            self._decode_row = text_row_decoder(self.connection, self.fields)
@@ -21,3 +21,8 @@ COM_BINLOG_DUMP = 0x12
 COM_TABLE_DUMP = 0x13
 COM_CONNECT_OUT = 0x14
 COM_REGISTER_SLAVE = 0x15
+COM_STMT_PREPARE = 0x16
+COM_STMT_EXECUTE = 0x17
+COM_STMT_SEND_LONG_DATA = 0x18
+COM_STMT_CLOSE = 0x19
+COM_STMT_RESET = 0x1a
@@ -11,12 +11,25 @@ from .err import Warning, Error, InterfaceError, DataError, \
              DatabaseError, OperationalError, IntegrityError, InternalError, \
             NotSupportedError, ProgrammingError
 
-insert_values = re.compile(r'\svalues\s*(\(.+\))', re.IGNORECASE)
+# INSERT ... VALUES (...) statements, split into the part before the
+# row template, the template, and an optional ON DUPLICATE KEY clause.
+insert_values = re.compile(
+    r'\A\s*((?:INSERT|REPLACE)\b.+?\sVALUES?\s*)'
+    r'(\(.+?\))'
+    r'(\s+ON\s+DUPLICATE\b.*?)?\s*;?\s*\Z',
+    re.IGNORECASE | re.DOTALL)
+format_markers = re.compile(r'%([s%])')
 
 class Cursor(object):
     '''
     This is the object you use to interact with the database.
     '''
+
+    #: executemany() joins the rows of an INSERT into statements of at
+    #: most this many bytes.  Keep it below the server's
+    #: max_allowed_packet.
+    max_stmt_length = 1024000
+
     def __init__(self, connection):
         '''
         Do not create an instance of a Cursor yourself. Call
@@ -90,19 +103,8 @@ class Cursor(object):
         charset = conn.charset
         del self.messages[:]
 
-        # TODO: make sure that conn.escape is correct
-
         if args is not None:
-            if isinstance(args, tuple) or isinstance(args, list):
-                escaped_args = tuple(conn.escape(arg) for arg in args)
-            elif isinstance(args, dict):
-                escaped_args = dict((key, conn.escape(val)) for (key, val) in list(args.items()))
-            else:
-                #If it's not a dictionary let's try escaping it anyways.
-                #Worst case it will throw a Value error
-                escaped_args = conn.escape(args)
-
-            query = query % escaped_args
+            query = query % self._escape_args(args, conn)
 
         if isinstance(query, str):
             query = query.encode(charset)
@@ -119,19 +121,58 @@ class Cursor(object):
         self._executed = query
         return result
 
+    def _escape_args(self, args, conn):
+        # TODO: make sure that conn.escape is correct
+        if isinstance(args, tuple) or isinstance(args, list):
+            return tuple(conn.escape(arg) for arg in args)
+        elif isinstance(args, dict):
+            return dict((key, conn.escape(val)) for (key, val) in list(args.items()))
+        else:
+            #If it's not a dictionary let's try escaping it anyways.
+            #Worst case it will throw a Value error
+            return conn.escape(args)
+
     def executemany(self, query, args):
-        ''' Run several data against one query '''
+        ''' Run several data against one query
+
+        INSERT and REPLACE statements are sent as multi-row statements
+        of up to max_stmt_length bytes, with only the VALUES template
+        formatted for each row.  Other queries are executed once per
+        row.  args may be any iterable.
+        '''
         del self.messages[:]
-        #conn = self._get_db()
         if not args:
             return
-        #charset = conn.charset
-        #if isinstance(query, unicode):
-        #    query = query.encode(charset)
-
-        self.rowcount = sum([ self.execute(query, arg) for arg in args ])
+        m = insert_values.match(query)
+        if m:
+            prefix, values, suffix = m.group(1, 2, 3)
+            self.rowcount = self._do_execute_many(
+                prefix, values, suffix or '', args)
+        else:
+            self.rowcount = sum(self.execute(query, arg) for arg in args)
         return self.rowcount
 
+    def _do_execute_many(self, prefix, values, suffix, args):
+        conn = self._get_db()
+        charset = conn.charset
+        prefix = prefix.encode(charset)
+        suffix = suffix.encode(charset)
+        rows = 0
+        sql = bytearray(prefix)
+        for arg in args:
+            v = (values % self._escape_args(arg, conn)).encode(charset)
+            if sql != prefix:
+                if (len(sql) + 1 + len(v) + len(suffix)
+                        > self.max_stmt_length):
+                    rows += Cursor.execute(self, bytes(sql + suffix))
+                    sql = bytearray(prefix)
+                else:
+                    sql += b','
+            sql += v
+        if sql != prefix:
+            rows += Cursor.execute(self, bytes(sql + suffix))
+        return rows
+
 
     def callproc(self, procname, args=()):
         """Execute stored procedure procname with args
@@ -255,6 +296,140 @@ class Cursor(object):
     ProgrammingError = ProgrammingError
     NotSupportedError = NotSupportedError
 
+class PreparedCursor(Cursor):
+    '''
+    A cursor which runs queries with sequence arguments as server-side
+    prepared statements.
+
+    Queries use the usual %s markers.  They are prepared once per
+    connection and cached, and the arguments are sent in binary form
+    instead of being escaped into the query.  Queries without
+    arguments, or with a dict of arguments, use the text protocol.
+    '''
+
+    def execute(self, query, args=None):
+        ''' Execute a query '''
+        from sys import exc_info
+
+        if args is None or isinstance(args, dict):
+            return super(PreparedCursor, self).execute(query, args)
+        if not isinstance(args, (tuple, list)):
+            args = (args,)
+
+        conn = self._get_db()
+        del self.messages[:]
+        query = format_markers.sub(
+            lambda m: '?' if m.group(1) == 's' else '%', query)
+
+        result = 0
+        try:
+            stmt = conn.prepare(query)
+            self._last_executed = stmt.query
+            conn.execute_prepared(stmt, args)
+            self._do_get_result()
+            result = self.rowcount
+        except:
+            exc, value, tb = exc_info()
+            del tb
+            self.messages.append((exc,value))
+            self.errorhandler(self, exc, value)
+
+        self._executed = query
+        return result
+
+class SSCursor(Cursor):
+    '''
+    An unbuffered cursor, which reads rows from the network as they are
+    fetched instead of all at once after execute().
+
+    Use it for large results: memory use does not grow with the size of
+    the result, and the first row is available as soon as it arrives.
+    The rest of the result must be read before the connection can run
+    another command; this is done automatically, discarding the rows.
+    rowcount is not known until all rows are fetched.
+    '''
+
+    def __init__(self, connection):
+        super(SSCursor, self).__init__(connection)
+        self._result = None
+
+    def _query(self, q):
+        conn = self._get_db()
+        self._last_executed = q
+        conn.query(q, unbuffered=True)
+        self._do_get_result()
+        return self.rowcount
+
+    def _do_get_result(self):
+        super(SSCursor, self)._do_get_result()
+        self._result = self._get_db()._result
+
+    def nextset(self):
+        ''' Get the next query set '''
+        conn = self._get_db()
+        if self._result is None or self._result is not conn._result:
+            return None
+        self._result._finish_unbuffered_query()
+        del self.messages[:]
+        if not self._result.has_next:
+            return None
+        conn.next_result(unbuffered=True)
+        self._do_get_result()
+        return True
+
+    def read_next(self):
+        ''' Read the next row from the network '''
+        return self._result._read_next_row()
+
+    def fetchone(self):
+        ''' Fetch the next row '''
+        self._check_executed()
+        row = self.read_next()
+        if row is None:
+            return None
+        self.rownumber += 1
+        return row
+
+    def fetchall_unbuffered(self):
+        ''' Return an iterator over the remaining rows '''
+        return iter(self.fetchone, None)
+
+    __iter__ = fetchall_unbuffered
+
+    def fetchall(self):
+        ''' Fetch all the remaining rows into a list '''
+        return list(self.fetchall_unbuffered())
+
+    def fetchmany(self, size=None):
+        ''' Fetch several rows '''
+        self._check_executed()
+        rows = []
+        for i in range(size or self.arraysize):
+            row = self.read_next()
+            if row is None:
+                break
+            rows.append(row)
+            self.rownumber += 1
+        return rows
+
+    def scroll(self, value, mode='relative'):
+        self._check_executed()
+        if mode == 'relative':
+            if value < 0:
+                self.errorhandler(self, NotSupportedError,
+                        "backwards scrolling not supported by this cursor")
+            for i in range(value):
+                self.read_next()
+            self.rownumber += value
+        elif mode == 'absolute':
+            if value < self.rownumber:
+                self.errorhandler(self, NotSupportedError,
+                        "backwards scrolling not supported by this cursor")
+            self.scroll(value - self.rownumber)
+        else:
+            self.errorhandler(self, ProgrammingError,
+                    "unknown scroll mode %s" % mode)
+
 class DictCursor(Cursor):
     """A cursor which returns results as a dictionary"""
 
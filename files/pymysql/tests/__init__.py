@@ -2,6 +2,10 @@ from pymysql.tests.test_issues import *
 from pymysql.tests.test_example import *
 from pymysql.tests.test_basic import *
 from pymysql.tests.test_DictCursor import *
+from pymysql.tests.test_prepared import *
+from pymysql.tests.test_SSCursor import *
+from pymysql.tests.test_executemany import *
+from pymysql.tests.test_packet import *
 
 import sys
 if sys.version_info[0] == 2:
@@ -0,0 +1,76 @@
+import unittest
+
+from pymysql.constants import FIELD_TYPE
+from pymysql.cursors import SSCursor
+from pymysql.tests import base
+from pymysql.tests.test_prepared import (
+    EOF_PACKET, FakeConnection, field, lcs, packet)
+
+
+def text_result(columns, rows):
+    """Return the packets of a text protocol result set."""
+    data = packet(1, bytes([len(columns)]))
+    seq = 2
+    for column in columns:
+        data += packet(seq, field(*column))
+        seq += 1
+    data += packet(seq, EOF_PACKET)
+    for row in rows:
+        seq += 1
+        data += packet(seq, b''.join(lcs(x) for x in row))
+    return data + packet(seq + 1, EOF_PACKET)
+
+
+class TestSSCursorOffline(unittest.TestCase):
+
+    columns = [(b'id', FIELD_TYPE.LONG), (b'word', FIELD_TYPE.VAR_STRING)]
+    rows = [(b'1', b'a'), (b'2', b'b'), (b'3', b'c')]
+
+    def test_stream(self):
+        responses = text_result(self.columns, self.rows)
+        conn = FakeConnection(responses)
+        cur = conn.cursor(SSCursor)
+        cur.execute('SELECT id, word FROM words')
+        self.assertEqual([x[0] for x in cur.description], ['id', 'word'])
+        self.assertEqual(cur.fetchone(), (1, 'a'))
+        # The remaining rows have not been read yet.
+        self.assertLess(conn.rfile.tell(), len(responses))
+        self.assertEqual(cur.fetchmany(5), [(2, 'b'), (3, 'c')])
+        self.assertEqual(conn.rfile.tell(), len(responses))
+        self.assertIsNone(cur.fetchone())
+        self.assertEqual(cur.rownumber, 3)
+        cur.close()
+
+    def test_drain(self):
+        first = text_result(self.columns, self.rows)
+        responses = first + text_result(self.columns, self.rows[:1])
+        conn = FakeConnection(responses)
+        cur = conn.cursor(SSCursor)
+        cur.execute('SELECT id, word FROM words')
+        self.assertEqual(cur.fetchone(), (1, 'a'))
+        # Running another query reads and discards the rest of the first.
+        other = conn.cursor(SSCursor)
+        other.execute('SELECT id, word FROM words LIMIT 1')
+        self.assertEqual(list(other), [(1, 'a')])
+        self.assertIsNone(cur.fetchone())
+        cur.close()
+        other.close()
+
+
+class TestSSCursor(base.PyMySQLTestCase):
+
+    def test_stream(self):
+        conn = self.connections[0]
+        c = conn.cursor()
+        c.execute('create table test_sscursor (id int)')
+        try:
+            c.executemany('insert into test_sscursor values (%s)',
+                          range(10))
+            ss = conn.cursor(SSCursor)
+            ss.execute('select id from test_sscursor order by id')
+            self.assertEqual(ss.fetchone(), (0,))
+            self.assertEqual(ss.fetchmany(2), [(1,), (2,)])
+            self.assertEqual([x[0] for x in ss], list(range(3, 10)))
+            ss.close()
+        finally:
+            c.execute('drop table test_sscursor')
@@ -0,0 +1,88 @@
+import unittest
+
+from pymysql import cursors
+from pymysql.tests import base
+from pymysql.tests.test_prepared import FakeConnection, packet
+
+
+def ok_packet(affected_rows):
+    return packet(1, b'\0' + bytes([affected_rows]) + b'\0\2\0\0\0')
+
+
+def sent_queries(conn):
+    """Split the COM_QUERY packets written to a FakeConnection."""
+    data = conn.wfile.getvalue()
+    queries = []
+    while data:
+        size = int.from_bytes(data[:3], 'little')
+        queries.append(data[5:4 + size])
+        data = data[4 + size:]
+    return queries
+
+
+class TestExecutemanyOffline(unittest.TestCase):
+
+    def test_insert_values(self):
+        m = cursors.insert_values.match(
+            'INSERT IGNORE INTO graph (word1, word2) VALUES '
+            '(%s, %s), (%s, %s)')
+        self.assertEqual(m.group(2), '(%s, %s), (%s, %s)')
+        m = cursors.insert_values.match(
+            'insert into t values (%(a)s, %(b)s) '
+            'on duplicate key update b=values(b);')
+        self.assertEqual(m.group(1, 2, 3), (
+            'insert into t values ', '(%(a)s, %(b)s)',
+            ' on duplicate key update b=values(b)'))
+        self.assertIsNone(cursors.insert_values.match(
+            'UPDATE t SET x=%s WHERE y=%s'))
+
+    def test_batch(self):
+        conn = FakeConnection(ok_packet(3))
+        cur = conn.cursor(cursors.Cursor)
+        rows = iter([(1, 'a'), (2, "b'c"), (3, None)])
+        self.assertEqual(cur.executemany(
+            'INSERT INTO t (id, word) VALUES (%s, %s)', rows), 3)
+        self.assertEqual(sent_queries(conn), [
+            b"INSERT INTO t (id, word) VALUES (1, 'a'),(2, 'b\\'c'),"
+            b"(3, NULL)"])
+        cur.close()
+
+    def test_chunks(self):
+        conn = FakeConnection(ok_packet(2) + ok_packet(2) + ok_packet(1))
+        cur = conn.cursor(cursors.Cursor)
+        cur.max_stmt_length = 30
+        self.assertEqual(cur.executemany(
+            'INSERT INTO t VALUES (%s)', [(x,) for x in range(5)]), 5)
+        queries = sent_queries(conn)
+        self.assertEqual(queries, [b'INSERT INTO t VALUES (0),(1)',
+                                   b'INSERT INTO t VALUES (2),(3)',
+                                   b'INSERT INTO t VALUES (4)'])
+        cur.close()
+
+    def test_other(self):
+        conn = FakeConnection(ok_packet(1) + ok_packet(1))
+        cur = conn.cursor(cursors.Cursor)
+        self.assertEqual(cur.executemany(
+            'UPDATE t SET x=%s', [(1,), (2,)]), 2)
+        self.assertEqual(sent_queries(conn), [b'UPDATE t SET x=1',
+                                              b'UPDATE t SET x=2'])
+        cur.close()
+
+
+class TestExecutemany(base.PyMySQLTestCase):
+
+    def test_batch(self):
+        conn = self.connections[0]
+        c = conn.cursor()
+        c.execute('create table test_executemany (id int, word text)')
+        try:
+            c.max_stmt_length = 100
+            self.assertEqual(c.executemany(
+                'insert into test_executemany values (%s, %s)',
+                ((x, str(x) * x) for x in range(50))), 50)
+            c.execute('select count(*), sum(length(word)) '
+                      'from test_executemany')
+            self.assertEqual(c.fetchone(), (50, sum(
+                len(str(x) * x) for x in range(50))))
+        finally:
+            c.execute('drop table test_executemany')
@@ -0,0 +1,115 @@
+import datetime
+import struct
+import unittest
+
+import pymysql
+from pymysql import connections
+from pymysql.constants import FIELD_TYPE, FLAG
+from pymysql.tests.test_prepared import FakeConnection, lcs, packet
+
+
+class Field:
+
+    def __init__(self, type_code, flags=0, charsetnr=33):
+        self.type_code = type_code
+        self.flags = flags
+        self.charsetnr = charsetnr
+
+
+class TestPacketOffline(unittest.TestCase):
+
+    def test_length_coded(self):
+        values = [b'', b'a', b'x' * 251, b'y' * 70000]
+        data = b''.join(lcs(x) for x in values) + b'\xfb'
+        conn = FakeConnection(packet(1, data))
+        pkt = connections.MysqlPacket(conn)
+        for value in values:
+            x = pkt.read_length_coded_string()
+            self.assertIs(type(x), bytes)
+            self.assertEqual(x, value)
+        self.assertIsNone(pkt.read_length_coded_string())
+        self.assertRaises(AssertionError, pkt.read_length_coded_binary)
+
+    def test_buffer(self):
+        big = b'z' * (connections.RECV_BUFFER_SIZE + 1)
+        conn = FakeConnection(packet(1, b'\0abc') + packet(2, b'\0de') +
+                              packet(3, big) + packet(4, b'\xfe'))
+        first = connections.MysqlPacket(conn)
+        self.assertEqual(first.packet_number(), 1)
+        self.assertEqual(first.read(1), b'\0')
+        data = first.read_all()
+        buf = conn._recv_buf
+        second = connections.MysqlPacket(conn)
+        # Values returned earlier are copies, and the buffer is reused.
+        self.assertEqual(data, b'abc')
+        self.assertIs(conn._recv_buf, buf)
+        self.assertTrue(second.is_ok_packet())
+        self.assertEqual(second.get_all_data(), b'\0de')
+        third = connections.MysqlPacket(conn)
+        self.assertEqual(third.get_all_data(), big)
+        self.assertTrue(connections.MysqlPacket(conn).is_eof_packet())
+
+    def test_lost_connection(self):
+        conn = FakeConnection(packet(1, b'\0abc')[:-1])
+        self.assertRaises(pymysql.OperationalError,
+                          connections.MysqlPacket, conn)
+
+
+class TestRowDecoderOffline(unittest.TestCase):
+
+    def decode(self, fields, values, decoders=None):
+        conn = FakeConnection(b'')
+        if decoders is not None:
+            conn.decoders = decoders
+        data = b''.join(b'\xfb' if x is None else lcs(x) for x in values)
+        return connections.text_row_decoder(conn, fields)(memoryview(data))
+
+    def test_int_bytes(self):
+        fields = [Field(FIELD_TYPE.LONG), Field(FIELD_TYPE.VAR_STRING,
+                                                FLAG.BINARY)]
+        self.assertEqual(self.decode(fields, [b'12', b'apple']),
+                         (12, b'apple'))
+        self.assertEqual(self.decode(fields, [b'12', None]), (12, None))
+        self.assertEqual(self.decode(fields, [None, b'x' * 300]),
+                         (None, b'x' * 300))
+
+    def test_convert(self):
+        fields = [Field(FIELD_TYPE.FLOAT), Field(FIELD_TYPE.VAR_STRING),
+                  Field(FIELD_TYPE.DATE), Field(FIELD_TYPE.GEOMETRY)]
+        self.assertEqual(
+            self.decode(fields, [b'0.5', 'äpple'.encode('utf8'),
+                                 b'2013-04-05', b'x']),
+            (0.5, 'äpple', datetime.date(2013, 4, 5), None))
+
+    def test_override(self):
+        decoders = dict(pymysql.converters.decoders)
+        decoders[FIELD_TYPE.LONG] = lambda conn, field, data: -int(data)
+        fields = [Field(FIELD_TYPE.LONG), Field(FIELD_TYPE.VAR_STRING,
+                                                FLAG.BINARY)]
+        self.assertEqual(self.decode(fields, [b'1', b'a'], decoders),
+                         (-1, b'a'))
+
+    def test_binary_int_bytes(self):
+        conn = FakeConnection(b'')
+        fields = [Field(FIELD_TYPE.LONG, FLAG.UNSIGNED),
+                  Field(FIELD_TYPE.VAR_STRING, FLAG.BINARY)]
+        decode = connections.binary_row_decoder(conn, fields)
+        row = b'\0\0' + struct.pack('<I', 2**32 - 1) + lcs(b'apple')
+        self.assertEqual(decode(memoryview(row)), (2**32 - 1, b'apple'))
+        row = b'\0\0' + struct.pack('<I', 1) + lcs(b'x' * 300)
+        self.assertEqual(decode(memoryview(row)), (1, b'x' * 300))
+        # NULL in the second column: bit 3
+        row = b'\0\x08' + struct.pack('<I', 1)
+        self.assertEqual(decode(memoryview(row)), (1, None))
+
+    def test_binary_int_widths(self):
+        conn = FakeConnection(b'')
+        for type_code, code in [(FIELD_TYPE.TINY, '<b'),
+                                (FIELD_TYPE.SHORT, '<h'),
+                                (FIELD_TYPE.INT24, '<i'),
+                                (FIELD_TYPE.LONGLONG, '<q')]:
+            fields = [Field(type_code), Field(FIELD_TYPE.VAR_STRING,
+                                              FLAG.BINARY)]
+            decode = connections.binary_row_decoder(conn, fields)
+            row = b'\0\0' + struct.pack(code, -2) + lcs(b'apple')
+            self.assertEqual(decode(memoryview(row)), (-2, b'apple'))
@@ -0,0 +1,165 @@
+import datetime
+import io
+import struct
+import unittest
+from collections import OrderedDict
+
+import pymysql
+from pymysql import connections
+from pymysql.constants import FIELD_TYPE, FLAG
+from pymysql.cursors import PreparedCursor
+from pymysql.tests import base
+
+
+def packet(seq, data):
+    return connections.pack_int24(len(data)) + bytes([seq & 0xff]) + data
+
+def lcs(data):
+    return connections.pack_length_coded_binary(len(data)) + data
+
+def field(name, type_code, flags=0, charsetnr=33):
+    return (lcs(b'def') + lcs(b'db') + lcs(b't') + lcs(b't') +
+            lcs(name) + lcs(name) + b'\x0c' +
+            struct.pack('<HIBHB', charsetnr, 255, type_code, flags, 0) +
+            b'\0\0')
+
+EOF_PACKET = b'\xfe\0\0\x02\0'
+
+
+class FakeConnection(connections.Connection):
+    """A Connection reading canned server packets, for offline tests."""
+
+    def __init__(self, responses):
+        self.rfile = io.BytesIO(responses)
+        self.wfile = io.BytesIO()
+        self.socket = True
+        self.charset = 'utf8'
+        self.use_unicode = True
+        self.decoders = pymysql.converters.decoders
+        self.encoders = pymysql.converters.encoders
+        self.messages = []
+        self._statements = OrderedDict()
+        self._result = None
+
+
+class TestPreparedOffline(unittest.TestCase):
+
+    def prepare_response(self, statement_id, columns, params):
+        data = packet(1, b'\0' + struct.pack('<IHHBH', statement_id,
+                                             len(columns), params, 0, 0))
+        seq = 2
+        for i in range(params):
+            data += packet(seq, field(b'?', FIELD_TYPE.VAR_STRING))
+            seq += 1
+        if params:
+            data += packet(seq, EOF_PACKET)
+            seq += 1
+        for column in columns:
+            data += packet(seq, field(*column))
+            seq += 1
+        if columns:
+            data += packet(seq, EOF_PACKET)
+        return data
+
+    def test_length_coded(self):
+        for n in [0, 250, 251, 65535, 65536, 2**24 - 1, 2**24, 2**40]:
+            data = connections.pack_length_coded_binary(n) + b'x'
+            self.assertEqual(connections.read_length_coded_binary(data, 0),
+                             (n, len(data) - 1))
+
+    def test_pack_params(self):
+        data = connections.pack_binary_params([1, None, 'ab', 0.5], 'utf8')
+        self.assertEqual(data[:2], b'\x02\x01')  # NULL bitmap, bound flag
+        types = struct.unpack('<8B', data[2:10])
+        self.assertEqual(types, (FIELD_TYPE.LONGLONG, 0, FIELD_TYPE.NULL, 0,
+                                 FIELD_TYPE.VAR_STRING, 0,
+                                 FIELD_TYPE.DOUBLE, 0))
+        self.assertEqual(data[10:],
+                         struct.pack('<q', 1) + b'\x02ab' +
+                         struct.pack('<d', 0.5))
+
+    def test_execute(self):
+        columns = [(b'id', FIELD_TYPE.LONG, FLAG.UNSIGNED),
+                   (b'word', FIELD_TYPE.VAR_STRING),
+                   (b'frequency', FIELD_TYPE.FLOAT),
+                   (b'added', FIELD_TYPE.DATETIME)]
+        rows = [
+            b'\0\0' + struct.pack('<I', 3) + lcs('äpple'.encode('utf8')) +
+            struct.pack('<f', 0.1) + b'\x07' + struct.pack(
+                '<HBBBBB', 2013, 4, 5, 6, 7, 8),
+            # NULL in the last column: bit 3 + 2
+            b'\0\x20' + struct.pack('<I', 2**32 - 1) + lcs(b'b') +
+            struct.pack('<f', 2),
+            ]
+        responses = self.prepare_response(7, columns, 1)
+        responses += packet(1, b'\x04')
+        seq = 2
+        for column in columns:
+            responses += packet(seq, field(*column))
+            seq += 1
+        responses += packet(seq, EOF_PACKET)
+        for row in rows:
+            seq += 1
+            responses += packet(seq, row)
+        responses += packet(seq + 1, EOF_PACKET)
+
+        conn = FakeConnection(responses)
+        cur = conn.cursor(PreparedCursor)
+        cur.execute('SELECT * FROM words WHERE word LIKE %s', 'ab%')
+        self.assertEqual(cur.fetchall(), (
+            (3, 'äpple', 0.1, datetime.datetime(2013, 4, 5, 6, 7, 8)),
+            (2**32 - 1, 'b', 2.0, None)))
+        self.assertEqual([x[0] for x in cur.description],
+                         ['id', 'word', 'frequency', 'added'])
+        sent = conn.wfile.getvalue()
+        prepare = b'SELECT * FROM words WHERE word LIKE ?'
+        self.assertEqual(sent[4:5 + len(prepare)],
+                         bytes([connections.COM_STMT_PREPARE]) + prepare)
+        execute = sent[4 + 1 + len(prepare):]
+        self.assertEqual(execute[4], connections.COM_STMT_EXECUTE)
+        self.assertEqual(struct.unpack('<IBI', execute[5:14]), (7, 0, 1))
+        self.assertEqual(execute[14:], connections.pack_binary_params(
+            ['ab%'], 'utf8'))
+        cur.close()
+
+    def test_cache(self):
+        responses = self.prepare_response(1, [], 1)
+        ok = b'\0\x01\x05\x02\0\0\0'
+        responses += packet(1, ok) + packet(1, ok)
+        conn = FakeConnection(responses)
+        cur = conn.cursor(PreparedCursor)
+        self.assertEqual(cur.execute('UPDATE t SET x=x+1 WHERE y=%s', 1), 1)
+        self.assertEqual(cur.lastrowid, 5)
+        self.assertEqual(cur.execute('UPDATE t SET x=x+1 WHERE y=%s', 2), 1)
+        self.assertEqual(len(conn._statements), 1)
+        self.assertRaises(pymysql.ProgrammingError, cur.execute,
+                          'UPDATE t SET x=x+1 WHERE y=%s', (1, 2))
+        cur.close()
+
+
+class TestPrepared(base.PyMySQLTestCase):
+
+    def test_roundtrip(self):
+        conn = self.connections[0]
+        c = conn.cursor(PreparedCursor)
+        c.execute('create table test_prepared (id int unsigned, '
+                  'word varchar(32), f float, d double, dt datetime, '
+                  't time)')
+        try:
+            dt = datetime.datetime(2013, 4, 5, 6, 7, 8)
+            t = datetime.timedelta(hours=-1, seconds=5)
+            c.execute('insert into test_prepared values '
+                      '(%s, %s, %s, %s, %s, %s)',
+                      (4000000000, 'äpple', 0.5, 0.1, dt, t))
+            c.execute('insert into test_prepared values '
+                      '(%s, %s, %s, %s, %s, %s)',
+                      (1, None, None, None, None, None))
+            c.execute('select * from test_prepared where id > %s order by id',
+                      0)
+            prepared = c.fetchall()
+            text = conn.cursor()
+            text.execute('select * from test_prepared order by id')
+            self.assertEqual(prepared, text.fetchall())
+            self.assertEqual(prepared[1][:3], (4000000000, 'äpple', 0.5))
+        finally:
+            c.execute('drop table test_prepared')
@@ -13,6 +13,7 @@ setup(
     scripts=['src/bin/' + x for x in [
         'gzserver', 'gzcli', 'gzshell',
         'make_graph', 'make_lexicon', 'import_lexicon', 'add_corpus',
+        'make_index', 'make_csr', 'dump_snapshot', 'migrate_schema',
         'test_correction',
         ]],
 )
@@ -1,35 +1,122 @@
 import logging
 import abc
-from functools import partial
-import random
+import sys
+import threading
+import heapq
+from array import array
 from functools import lru_cache
 from operator import itemgetter
 from collections import defaultdict
-from collections import deque
+from collections import OrderedDict
 from numbers import Number
+from itertools import islice
 from itertools import repeat
-from weakref import WeakKeyDictionary
-from weakref import WeakValueDictionary
+from contextlib import contextmanager
+
+from gzspell import pool
 
-import pymysql
 
 logger = logging.getLogger(__name__)
 
 GRAPH_THRESHOLD = 4
+# Words compared per editdist_many call when building graph edges.
+GRAPH_CHUNK = 4096
 INITIAL_FREQ = 0.01
 
 
 class Database:
 
-    def __init__(self, *args, **kwargs):
+    """
+    MySQL lexicon database.
+
+    Arguments other than the ones below are passed to pymysql.connect.
+    Connections are kept in a pool.Pool and reused.  Queries with
+    arguments run as server-side prepared statements, through
+    pymysql.cursors.PreparedCursor, unless another cursorclass is given.
+
+    Args:
+        pool_size: maximum number of open connections
+        pool_timeout: seconds to wait for a free connection, or None to
+            wait forever
+
+    """
+
+    def __init__(self, *args, pool_size=8, pool_timeout=None, **kwargs):
+        # Imported here so that offline tools don't load the driver.
+        import pymysql
+        import pymysql.cursors
+        self._pymysql = pymysql
         self._args = args
+        kwargs.setdefault('cursorclass', pymysql.cursors.PreparedCursor)
         self._kwargs = kwargs
+        self._pool = pool.Pool(self._connect, pool_size, pool_timeout)
+        # Frequency counts by id and their total, kept up to date by
+        # add_word and add_freq.
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._total = None
 
     def _connect(self):
-        return pymysql.connect(*self._args, **self._kwargs)
+        return self._pymysql.connect(*self._args, **self._kwargs)
+
+    @contextmanager
+    def _cursor(self):
+        """Borrow a pooled connection and return a cursor on it.
+
+        The transaction is committed on success and rolled back on
+        error.  Connections that fail are closed instead of reused.
+
+        """
+        conn = self._pool.acquire()
+        broken = (self._pymysql.OperationalError,
+                  self._pymysql.InterfaceError, OSError)
+        try:
+            with conn as cur:
+                yield cur
+        except broken:
+            self._pool.release(conn, discard=True)
+            raise
+        except BaseException:
+            self._pool.release(conn)
+            raise
+        else:
+            self._pool.release(conn)
+
+    @staticmethod
+    def _in_list(ids):
+        """Return markers and arguments for an IN (...) list.
+
+        The ids are padded to a power of two by repeating the last one,
+        so that only a few distinct statements get prepared.
+
+        """
+        ids = list(ids)
+        size = 1
+        while size < len(ids):
+            size *= 2
+        ids.extend(ids[-1:] * (size - len(ids)))
+        return ', '.join(['%s'] * size), ids
+
+    def pool_stats(self):
+        """Return connection pool metrics."""
+        return self._pool.stats()
+
+    def _stream(self, cur, query):
+        """Yield the rows of a query as they arrive from the server.
+
+        The rows are read with an unbuffered cursor on the connection of
+        `cur`, which cannot run other queries until the rows are read.
+
+        """
+        ss = cur.connection.cursor(self._pymysql.cursors.SSCursor)
+        try:
+            ss.execute(query)
+            yield from ss
+        finally:
+            ss.close()
 
     def hasword(self, word):
-        with self._connect() as cur:
+        with self._cursor() as cur:
             cur.execute('SELECT id FROM words WHERE word=%s', word)
             x = cur.fetchone()
             if x:
@@ -38,64 +125,179 @@ class Database:
                 return False
 
     def freq(self, id):
-        with self._connect() as cur:
-            cur.execute('SELECT frequency FROM words WHERE id=%s', id)
-            count = cur.fetchone()[0]
-            assert isinstance(count, Number)
-            cur.execute('SELECT sum(frequency) FROM words')
-            total = cur.fetchone()[0]
-            assert isinstance(total, Number)
-            return count / total
+        return self.freq_many([id])[id]
+
+    def freq_many(self, ids):
+        """Return a dict mapping each id to its frequency."""
+        with self._lock:
+            counts = {id: self._counts[id] for id in ids
+                      if id in self._counts}
+            total = self._total
+        missing = [id for id in ids if id not in counts]
+        if missing or total is None:
+            with self._cursor() as cur:
+                if missing:
+                    markers, args = self._in_list(missing)
+                    cur.execute(
+                        'SELECT id, frequency FROM words WHERE id IN ({})'
+                        .format(markers), args)
+                    fetched = dict(cur.fetchall())
+                    counts.update(fetched)
+                if total is None:
+                    total = self._fetch_total(cur)
+            with self._lock:
+                if missing:
+                    self._counts.update(fetched)
+                if self._total is None:
+                    self._total = total
+        return {id: counts[id] / total for id in ids}
+
+    def _fetch_total(self, cur):
+        cur.execute('SELECT sum(frequency) FROM words')
+        total = cur.fetchone()[0]
+        assert isinstance(total, Number)
+        return total
+
+    def _get_total(self, cur):
+        with self._lock:
+            total = self._total
+        if total is None:
+            total = self._fetch_total(cur)
+            with self._lock:
+                if self._total is None:
+                    self._total = total
+        return total
+
+    def invalidate(self):
+        """Drop cached frequencies, e.g. after outside writes."""
+        with self._lock:
+            self._counts.clear()
+            self._total = None
 
     def len_startswith(self, a, b, prefix):
-        with self._connect() as cur:
-            cur.execute(' '.join((
-                'SELECT id, word FROM words WHERE length BETWEEN %s AND %s',
-                'AND word LIKE %s')), (a, b, prefix + '%'))
+        with self._cursor() as cur:
+            if prefix:
+                # Uses the (first_char, length) index.
+                cur.execute(' '.join((
+                    'SELECT id, word FROM words WHERE first_char=%s',
+                    'AND length BETWEEN %s AND %s AND word LIKE %s')),
+                    (prefix[0], a, b, prefix + '%'))
+            else:
+                cur.execute(' '.join((
+                    'SELECT id, word FROM words',
+                    'WHERE length BETWEEN %s AND %s')), (a, b))
             return [(x[0], x[1].decode('utf8')) for x in cur.fetchall()]
 
     def neighbors(self, word_id):
-        with self._connect() as cur:
+        with self._cursor() as cur:
             cur.execute(' '.join((
                 'SELECT word2, word FROM graph',
                 'LEFT JOIN words ON graph.word2=words.id WHERE word1=%s',
             )), word_id)
             return [(x[0], x[1].decode('utf8')) for x in cur.fetchall()]
 
+    def neighbors_many(self, ids):
+        """Return a dict mapping each id to a list of (id, word) neighbors."""
+        found = {id: [] for id in ids}
+        if not found:
+            return found
+        markers, args = self._in_list(found)
+        with self._cursor() as cur:
+            cur.execute(' '.join((
+                'SELECT word1, word2, word FROM graph',
+                'LEFT JOIN words ON graph.word2=words.id',
+                'WHERE word1 IN ({})'.format(markers),
+            )), args)
+            for id, id_neighbor, word in cur.fetchall():
+                found[id].append((id_neighbor, word.decode('utf8')))
+        return found
+
+    def all_words(self):
+        """Iterate over all words: (id, word, frequency count).
+
+        Rows are streamed, so the whole table is never held in memory.
+        A pooled connection is held until the iterator is exhausted or
+        closed.
+
+        """
+        with self._cursor() as cur:
+            for id, word, count in self._stream(
+                    cur, 'SELECT id, word, frequency FROM words'):
+                yield id, word.decode('utf8'), count
+
+    def all_edges(self):
+        """Iterate over all graph edges: (word1, word2).
+
+        Rows are streamed like in all_words().
+
+        """
+        with self._cursor() as cur:
+            yield from self._stream(cur, 'SELECT word1, word2 FROM graph')
+
     def add_word(self, word, freq):
         logger.debug('add_word(%r, %r)', word, freq)
-        with self._connect() as cur:
-            cur.execute('SELECT sum(frequency) FROM words')
-            total_freq = cur.fetchone()[0]
-            assert isinstance(total_freq, Number)
-            cur.execute(' '.join((
+        with self._cursor() as cur:
+            count = self._get_total(cur) * freq
+            inserted = cur.execute(' '.join((
                     'INSERT IGNORE INTO words SET',
-                    'word=%s, length=%s, frequency=%s',)),
-                (word, len(word), total_freq * freq))
-            cur.execute('SELECT LAST_INSERT_ID()')
+                    'word=%s, first_char=%s, length=%s, frequency=%s',)),
+                (word, word[:1], len(word), count))
+            if inserted:
+                cur.execute('SELECT LAST_INSERT_ID()')
+            else:
+                cur.execute('SELECT id FROM words WHERE word=%s', word)
             id = cur.fetchone()[0]
             assert isinstance(id, int)
-            cur.execute('SELECT id, word FROM words')
-            wordlist = [(a, b.decode('utf8')) for a, b in cur.fetchall()]
+            if not inserted:
+                return id
+            with self._lock:
+                self._counts[id] = count
+                if self._total is not None:
+                    self._total += count
+            # Only the neighbors are kept; the connection is free again
+            # once the word list has been streamed through.
+            wordlist = ((a, b.decode('utf8')) for a, b in self._stream(
+                cur, 'SELECT id, word FROM words'))
+            found = list(self._gen_graph(word, wordlist))
             cur.executemany(' '.join((
                 'INSERT IGNORE INTO graph (word1, word2) VALUES',
                 '(%s, %s), (%s, %s)',)),
-                ((x, y, y, x) for x, y in zip(
-                    repeat(id), self._gen_graph(word, wordlist))))
+                ((x, y, y, x) for x, y in zip(repeat(id), found)))
+            return id
 
     @staticmethod
     def _gen_graph(target, wordlist):
+        """Yield ids of words close enough to target to share an edge.
+
+        `wordlist` is an iterable of (id, word), consumed in chunks.
+
+        """
         logger.debug('_gen_graph(%r, wordlist)', target)
         threshold = GRAPH_THRESHOLD
-        for id, word in wordlist:
-            if editdist(word, target) < threshold:
-                yield id
+        wordlist = iter(wordlist)
+        while True:
+            chunk = list(islice(wordlist, GRAPH_CHUNK))
+            if not chunk:
+                break
+            dists = editdist_many(
+                target, [word for id, word in chunk], threshold)
+            for (id, word), dist in zip(chunk, dists):
+                if dist < threshold:
+                    yield id
 
     def add_freq(self, word, freq):
-        with self._connect() as cur:
-            cur.execute(
-                'UPDATE words SET frequency=frequency + %s WHERE word=%s',
-                (word, freq))
+        with self._cursor() as cur:
+            if not cur.execute(
+                    'UPDATE words SET frequency=frequency + %s WHERE word=%s',
+                    (freq, word)):
+                return
+            cur.execute('SELECT id, frequency FROM words WHERE word=%s', word)
+            rows = cur.fetchall()
+        with self._lock:
+            for id, count in rows:
+                self._counts[id] = count
+            if self._total is not None:
+                self._total += freq * len(rows)
 
     def balance_freq(self):
         raise NotImplementedError
@@ -105,11 +307,21 @@ class Spell:
 
     LOOKUP_THRESHOLD = 3
     LENGTH_ERR = 2
-    INIT_LIMIT = 200
-    MAX_TRIES = 10
+    MAX_CANDIDATES = 10
+    MAX_EXPANSIONS = 50
+    EXPAND_BATCH = 8
+
+    def __init__(self, db, index=None):
+        """
+        Args:
+            db: Database to use
+            index: Optional candidate index.  If given, candidates are
+                taken from index.search(word, limit) instead of the
+                database graph.
 
-    def __init__(self, db):
+        """
         self.db = db
+        self.index = index
 
     def check(self, word):
         if self.db.hasword(word):
@@ -122,67 +334,107 @@ class Spell:
         logger.debug('correct(%r)', word)
         assert isinstance(word, str)
 
+        if self.index is not None:
+            cands = self.index.search(word, self.LOOKUP_THRESHOLD)
+        else:
+            cands = self._search(word)
+        if not cands:
+            logger.debug('no candidates')
+            return None
+        freqs = self.db.freq_many([id for id, word_cand, dist in cands])
+        candidates = [
+            (id, word_cand, self._cost(dist, freqs[id], word_cand, word))
+            for id, word_cand, dist in cands]
+        logger.debug('Candidates: %r', candidates)
+        id, word, cost = min(candidates, key=itemgetter(2))
+        return word
+
+    def _search(self, word):
+        """Find candidates using the database.
+
+        Return a list of tuples: (id, word, distance).
+
+        """
+
         # get initial candidates
         length = len(word)
         init_cands = self.db.len_startswith(
             length - self.LENGTH_ERR, length + self.LENGTH_ERR, word[0])
         if not init_cands:
-            logger.debug('no candidates')
-            return None
+            return []
 
+        # score every initial candidate
+        dists = editdist_many(
+            word, [word_cand for id_cand, word_cand in init_cands],
+            self.LOOKUP_THRESHOLD)
         cands = []
         seen = set()
-        tries = 0
-        while tries < self.MAX_TRIES and len(cands) < 10:
-            tries += 1
-            self._try_candidate(word, init_cands, cands, seen)
-        if not cands:
-            return None
-        candidates = [(id, word_cand, self._cost(dist, id, word_cand, word))
-                      for id, word_cand, dist in cands]
-        logger.debug('Candidates: %r', candidates)
-        id, word, cost = min(candidates, key=itemgetter(2))
-        return word
+        for (id_cand, word_cand), dist in zip(init_cands, dists):
+            seen.add(id_cand)
+            if dist <= self.LOOKUP_THRESHOLD:
+                cands.append((id_cand, word_cand, dist))
 
-    def _try_candidate(self, word, init_cands, cands, seen):
-
-        init_tries = 0
-        # select inital candidate
-        id_cand, word_cand = random.choice(init_cands)
-        x = editdist(word_cand, word, self.LOOKUP_THRESHOLD)
-        while x > self.LOOKUP_THRESHOLD:
-            id_cand, word_cand = random.choice(init_cands)
-            init_tries += 1
-            if init_tries > self.INIT_LIMIT:
-                logger.debug('Candidate search limit hit')
-                return
-            x = editdist(word_cand, word, self.LOOKUP_THRESHOLD)
-        cands.append((id_cand, word_cand, x))
-        seen.add(id_cand)
+        # traverse graph from the closest candidates
+        self._explore(word, seen, cands)
+        return cands
 
-        # traverse graph
-        self._explore(word, seen, cands, id_cand)
+    def _explore(self, word, seen, cands):
+        """Best-first search of the graph from the candidates found.
+
+        Nodes are expanded in order of distance to the word, up to
+        EXPAND_BATCH at a time, so that each round fetches the neighbors
+        of a whole batch with one neighbors_many call.  The search stops
+        after MAX_EXPANSIONS expansions, or once MAX_CANDIDATES
+        candidates are found and the next node is farther than all of
+        the best MAX_CANDIDATES.
 
-    def _explore(self, word, seen, cands, id_node):
-        """
         Args:
             word: misspelled word
             seen: set of seen candidate ids
-            cands: candidates
-            id_node: current node
+            cands: candidates; new candidates are appended
 
         """
-        id_new = set()
-        for id_neighbor, word_neighbor in self.db.neighbors(id_node):
-            if id_neighbor not in seen:
-                logger.debug("Visiting %r", id_neighbor)
-                seen.add(id_neighbor)
-                dist = editdist(word, word_neighbor, self.LOOKUP_THRESHOLD)
+        frontier = [(dist, id, word_cand) for id, word_cand, dist in cands]
+        heapq.heapify(frontier)
+        # max-heap of the best MAX_CANDIDATES distances
+        best = [-dist for dist in heapq.nsmallest(
+            self.MAX_CANDIDATES, (x[0] for x in frontier))]
+        heapq.heapify(best)
+        expansions = 0
+        rounds = 0
+        while frontier and expansions < self.MAX_EXPANSIONS:
+            batch = []
+            while (frontier and len(batch) < self.EXPAND_BATCH and
+                   expansions < self.MAX_EXPANSIONS):
+                if len(best) >= self.MAX_CANDIDATES and \
+                        frontier[0][0] > -best[0]:
+                    break
+                dist, id_node, word_node = heapq.heappop(frontier)
+                batch.append(id_node)
+                expansions += 1
+            if not batch:
+                break
+            rounds += 1
+            logger.debug('Expanding %d nodes', len(batch))
+            new = []
+            for id_node, neighbors in self.db.neighbors_many(batch).items():
+                for id_neighbor, word_neighbor in neighbors:
+                    if id_neighbor not in seen:
+                        seen.add(id_neighbor)
+                        new.append((id_neighbor, word_neighbor))
+            dists = editdist_many(
+                word, [word_neighbor for id_neighbor, word_neighbor in new],
+                self.LOOKUP_THRESHOLD)
+            for (id_neighbor, word_neighbor), dist in zip(new, dists):
                 if dist <= self.LOOKUP_THRESHOLD:
                     cands.append((id_neighbor, word_neighbor, dist))
-                    id_new.add(id_neighbor)
-        for id_node in id_new:
-            self._explore(word, seen, cands, id_node)
+                    heapq.heappush(
+                        frontier, (dist, id_neighbor, word_neighbor))
+                    if len(best) < self.MAX_CANDIDATES:
+                        heapq.heappush(best, -dist)
+                    elif dist < -best[0]:
+                        heapq.heapreplace(best, -dist)
+        logger.debug('%d nodes expanded in %d rounds', expansions, rounds)
 
     def process(self, word):
         if self.check(word) == 'OK':
@@ -192,7 +444,13 @@ class Spell:
             return ' '.join(('WRONG', correct if correct is not None else ''))
 
     def add(self, word):
-        self.db.add_word(word, INITIAL_FREQ)
+        if self.index is None or not hasattr(self.index, 'add'):
+            self.db.add_word(word, INITIAL_FREQ)
+            return
+        new = not self.db.hasword(word)
+        id = self.db.add_word(word, INITIAL_FREQ)
+        if new:
+            self.index.add(word, id)
 
     def bump(self, word):
         self.db.add_freq(word, 1)
@@ -203,11 +461,11 @@ class Spell:
         else:
             self.bump(word)
 
-    def _cost(self, dist, id_word, word, target):
+    def _cost(self, dist, freq, word, target):
         """
         Args:
             dist: Distance between words
-            id_word: ID of word in graph
+            freq: Frequency of word
             word: word in graph
             target: Misspelled word
 
@@ -218,7 +476,7 @@ class Spell:
         cost += abs(len(target) - len(word)) / 2
         if target[0] != word[0]:
             cost += 1
-        cost *= (1 - self.db.freq(id_word))
+        cost *= (1 - freq)
         return cost
 
 
@@ -257,130 +515,489 @@ class Costs:
         "'": ('p',),
     }
 
+    # Cost of replacing a character not in keys, or with one
+    UNKNOWN_COST = 5
+
     def __init__(self):
-        self.costs = [
-            [float('+inf') for i in range(len(self.keys))]
-            for j in range(len(self.keys))]
+        # The table has an extra slot for characters not in keys.
+        self.fallback = len(self.keys)
+        self.size = len(self.keys) + 1
+        self.slots = {char: i for i, char in enumerate(self.keys)}
+        self._table = None
+
+    @property
+    def table(self):
+        """Costs table, computed on first use."""
+        if self._table is None:
+            self.compute()
+        return self._table
+
+    def slot(self, char):
+        """Return the table slot for a character."""
+        return self.slots.get(char, self.fallback)
+
+    def encode(self, word):
+        """Return the list of table slots for a word."""
+        slots = self.slots
+        fallback = self.fallback
+        return [slots.get(char, fallback) for char in word]
+
+    def _index(self, a, b):
+        try:
+            return self.slots[a] * self.size + self.slots[b]
+        except KeyError:
+            raise ValueError('not in costs table: {!r}, {!r}'.format(a, b))
 
     def get(self, a, b):
-        return self.costs[self.keys.index(a)][self.keys.index(b)]
+        return self.table[self._index(a, b)]
 
     def set(self, a, b, v):
-        self.costs[self.keys.index(a)][self.keys.index(b)] = v
+        self.table[self._index(a, b)] = v
 
     def compute(self):
+        size = self.size
+        slots = self.slots
+        table = array('d', [float('+inf')]) * (size * size)
+        for i in range(size):
+            table[i * size + self.fallback] = self.UNKNOWN_COST
+            table[self.fallback * size + i] = self.UNKNOWN_COST
+        # Keys are adjacent both ways, so that costs (and editdist) are
+        # symmetric.
+        neighbors = defaultdict(set)
+        for a, keys in self._neighbors.items():
+            for k in keys:
+                neighbors[a].add(k)
+                neighbors[k].add(a)
         for a in self._neighbors:
             logger.debug('Computing for a=%r', a)
+            row = slots[a] * size
             unvisited = set(self.keys)
-            self.set(a, a, 0)
+            table[row + slots[a]] = 0
             while unvisited:
-                current = min(unvisited, key=partial(self.get, a))
-                logger.debug('Computing for current=%r', current)
-                for k in self._neighbors[current]:
-                    if k not in unvisited:
-                        continue
-                    else:
-                        self.set(a, k, min(
-                            self.get(a, k), self.get(a, current) + 0.5))
+                current = min(unvisited, key=lambda k: table[row + slots[k]])
+                cost = table[row + slots[current]] + 0.5
+                for k in neighbors[current]:
+                    if k in unvisited:
+                        i = row + slots[k]
+                        table[i] = min(table[i], cost)
                 unvisited.remove(current)
+        # Only publish the table once it is complete.
+        self._table = table
 
     def print(self):
         for i, x in enumerate(self.keys):
             print(x)
             print(', '.join(
-                ': '.join((y, str(self.costs[i][j])))
+                ': '.join((y, str(self.table[i * self.size + j])))
                 for j, y in enumerate(self.keys)))
 
     def repl_cost(self, a, b):
-        assert isinstance(a, str) and len(a) == 1
-        assert isinstance(b, str) and len(b) == 1
-        try:
-            cost = self.get(a, b)
-        except ValueError:  # not in costs table
-            return 5
-        assert cost is not None
-        return cost
+        slots = self.slots
+        fallback = self.fallback
+        return self.table[slots.get(a, fallback) * self.size +
+                          slots.get(b, fallback)]
 
 costs = Costs()
-costs.compute()
 
 
-class Key:
+class Cache:
 
-    __slots__ = ['__weakref__']
+    """Bounded LRU cache of edit distances.
+
+    Entries are keyed on the ordered word pair, so lookups for (a, b)
+    and (b, a) share one entry.  The cache is bounded by number of
+    entries and optionally by an estimate of its size in bytes; the
+    least recently used entries are evicted first.
+
+    An entry holds either an exact distance, which answers lookups with
+    any limit, or the largest limit the distance is known to exceed,
+    which answers lookups with any limit up to that one.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups that found an entry.
+    misses : int
+        Number of lookups that did not find an entry.
+    evictions : int
+        Number of entries evicted to stay within bounds.
+
+    """
+
+    # Estimated bytes per entry on top of the words themselves: key
+    # tuple, value, and dict slot.
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, maxsize=2**16, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
 
+    @staticmethod
+    def _key(a, b):
+        if a <= b:
+            return (a, b)
+        else:
+            return (b, a)
 
-class Cache:
+    @classmethod
+    def _size(cls, key):
+        return sys.getsizeof(key[0]) + sys.getsizeof(key[1]) + \
+            cls.ENTRY_OVERHEAD
 
-    def __init__(self):
-        self.keymap = WeakValueDictionary()
-        self.costmap = WeakKeyDictionary()
-        self.items = deque(maxlen=2**14)
+    def get(self, a, b, limit):
+        """Return cost for the given limit or raise KeyError"""
+        key = self._key(a, b)
+        with self._lock:
+            try:
+                cost, exact = self.items[key]
+                if not exact:
+                    # cost is a limit the distance exceeds
+                    if limit is None or limit > cost:
+                        raise KeyError(key)
+                    cost = float('+inf')
+                elif limit is not None and cost > limit:
+                    cost = float('+inf')
+            except KeyError:
+                self.misses += 1
+                raise
+            self.items.move_to_end(key)
+            self.hits += 1
+            return cost
 
     def set(self, a, b, limit, cost):
-        x = (a, b, limit)
-        try:
-            key = self.keymap[x]
-        except KeyError:
-            key = Key()
-        self.keymap[x] = key
-        self.costmap[key] = cost
-        self.items.appendleft(key)
+        """Store cost as calculated with the given limit."""
+        key = self._key(a, b)
+        if cost == float('+inf'):
+            assert limit is not None
+            value = (limit, False)
+        else:
+            value = (cost, True)
+        with self._lock:
+            try:
+                old = self.items[key]
+            except KeyError:
+                self.bytes += self._size(key)
+            else:
+                if old[1] or (not value[1] and old[0] >= value[0]):
+                    # old entry answers at least as much
+                    value = old
+            self.items[key] = value
+            self.items.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize=None, maxbytes=None):
+        """Set new bounds, evicting entries as needed."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.maxbytes = maxbytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self.items.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Return a dict of cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.items),
+                'bytes': self.bytes,
+                'maxsize': self.maxsize,
+                'maxbytes': self.maxbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0,
+            }
+
+    def _evict(self):
+        items = self.items
+        while items and (
+                (self.maxsize is not None and len(items) > self.maxsize) or
+                (self.maxbytes is not None and self.bytes > self.maxbytes)):
+            key, cost = items.popitem(last=False)
+            self.bytes -= self._size(key)
+            self.evictions += 1
 
-    def get(self, a, b, limit):
-        """Return cost or raise KeyError"""
-        try:
-            return self._get((a, b, limit))
-        except KeyError:
-            pass
-        return self._get((b, a, limit))
+_ed_cache = Cache()
 
-    def _get(self, x):
-        key = self.keymap[x]
-        cost = self.costmap[key]
-        self.items.appendleft(key)
-        return cost
 
-_ed_cache = Cache()
+def editdist_cache():
+    """Return the :class:`Cache` used by :func:`editdist`."""
+    return _ed_cache
 
 
-@lru_cache(2**12)
 def editdist(a, b, limit=None):
-    x = _r_editdist(a, b, limit, 0)
-    logger.debug('editdist(%r, %r, %r) = %r', a, b, limit, x)
-    return x
-
-def _r_editdist(a, b, limit, cost):
     assert isinstance(a, str)
     assert isinstance(b, str)
     try:
         return _ed_cache.get(a, b, limit)
     except KeyError:
         pass
-    # early cutoff
-    if limit and cost > limit:
-        logger.debug('Early cutoff on editdist hit')
-        return float('+inf')
-    # base case
-    if not a and not b:
-        logger.debug('editdist base case hit; cost is %r', cost)
-        _ed_cache.set(a, b, limit, 0)
-        return 0
-    possible = [float('+inf')]
-    # insert in a
-    if len(b) >= 1:
-        possible.append(_r_editdist(a, b[:-1], limit, cost+1) + 1)
-    # delete in a
-    if len(a) >= 1:
-        possible.append(_r_editdist(a[:-1], b, limit, cost+1) + 1)
-    # replace or same
-    if len(a) >= 1 and len(b) >= 1:
-        d = costs.repl_cost(a[-1], b[-1])
-        possible.append(_r_editdist(a[:-1], b[:-1], limit, cost+d) + d)
-    # transposition
-    if len(a) >= 2 and len(b) >= 2 and a[-1] == b[-2] and a[-2] == b[-1]:
-        possible.append(_r_editdist(a[:-2], b[:-2], limit, cost+1) + 1)
-    return_cost = min(possible)
-    logger.debug('editdist cost at this level %r', return_cost)
-    _ed_cache.set(a, b, limit, return_cost)
-    return return_cost
+    if limit is not None and unit_editdist(a, b, 2 * limit) > 2 * limit:
+        # Every weighted edit costs at least half a unit edit.
+        x = float('+inf')
+    else:
+        x = _editdist(a, b, limit)
+    _ed_cache.set(a, b, limit, x)
+    logger.debug('editdist(%r, %r, %r) = %r', a, b, limit, x)
+    return x
+
+
+def _editdist(a, b, limit):
+    """Weighted edit distance, computed row by row over `a`.
+
+    Only cells in the diagonal band |i - j| <= limit are computed, since
+    insertions and deletions cost 1 each and any cell outside the band
+    must exceed `limit`.  Computation stops as soon as every cell in a
+    row exceeds `limit`, returning infinity.
+
+    """
+    inf = float('+inf')
+    m, n = len(a), len(b)
+    if limit is None:
+        width = max(m, n)
+    elif abs(m - n) > limit:
+        return inf
+    else:
+        width = int(limit)
+    table = costs.table
+    size = costs.size
+    slots_a = costs.encode(a)
+    slots_b = costs.encode(b)
+    prev2 = None
+    prev = [j if j <= width else inf for j in range(n + 1)]
+    for i in range(1, m + 1):
+        cur = [inf] * (n + 1)
+        if i <= width:
+            cur[0] = i
+        lo = max(1, i - width)
+        hi = min(n, i + width)
+        ca = a[i - 1]
+        base = slots_a[i - 1] * size
+        for j in range(lo, hi + 1):
+            cb = b[j - 1]
+            # replace or same
+            x = prev[j - 1] + table[base + slots_b[j - 1]]
+            # insert in a
+            y = cur[j - 1] + 1
+            if y < x:
+                x = y
+            # delete in a
+            y = prev[j] + 1
+            if y < x:
+                x = y
+            # transposition
+            if (i >= 2 and j >= 2 and ca == b[j - 2] and a[i - 2] == cb):
+                y = prev2[j - 2] + 1
+                if y < x:
+                    x = y
+            cur[j] = x
+        if limit is not None and min(cur[max(0, i - width):hi + 1]) > limit:
+            logger.debug('Early cutoff on editdist hit')
+            return inf
+        prev2, prev = prev, cur
+    x = prev[n]
+    if limit is not None and x > limit:
+        return inf
+    return x
+
+
+def unit_editdist(a, b, limit=None):
+    """Unit-cost edit distance with adjacent transpositions.
+
+    Uses Hyyro's bit-vector algorithm, with one bit per character of
+    `a`.  If `limit` is given, computation may stop early once the
+    distance is known to exceed it, in which case the returned value is
+    only a lower bound greater than `limit`.
+
+    Since every weighted edit costs at least half a unit edit, half of
+    this distance is a lower bound for :func:`editdist`.
+
+    """
+    m = len(a)
+    n = len(b)
+    if not m:
+        return n
+    peq = {}
+    bit = 1
+    for c in a:
+        peq[c] = peq.get(c, 0) | bit
+        bit <<= 1
+    mask = (1 << m) - 1
+    top = 1 << (m - 1)
+    vp = mask
+    vn = 0
+    d0 = 0
+    pm_prev = 0
+    score = m
+    for j, c in enumerate(b, 1):
+        pm = peq.get(c, 0)
+        d0 = ((((~d0 & pm) << 1) & pm_prev) |
+              (((pm & vp) + vp) ^ vp) | pm | vn)
+        hp = vn | ~(d0 | vp)
+        hn = d0 & vp
+        if hp & top:
+            score += 1
+        elif hn & top:
+            score -= 1
+        # score can fall by at most one per remaining column
+        if limit is not None and score - (n - j) > limit:
+            return score - (n - j)
+        hp = (hp << 1) | 1
+        hn <<= 1
+        vp = (hn | ~(d0 | hp)) & mask
+        vn = hp & d0 & mask
+        pm_prev = pm
+    return score
+
+
+def editdist_many(target, words, limit=None):
+    """Calculate :func:`editdist` between `target` and many words.
+
+    Return a list of distances in the same order as `words`, where the
+    distance for each word is ``editdist(word, target, limit)``.
+
+    If NumPy is available, words of equal length are scored together,
+    advancing the DP rows for all of them at once.  Cached distances are
+    reused, and distances within `limit` are added to the cache.
+
+    """
+    assert isinstance(target, str)
+    if _numpy() is None:
+        return [editdist(word, target, limit) for word in words]
+    inf = float('+inf')
+    results = [inf] * len(words)
+    groups = defaultdict(list)
+    for i, word in enumerate(words):
+        assert isinstance(word, str)
+        if limit is not None and abs(len(word) - len(target)) > limit:
+            continue
+        try:
+            results[i] = _ed_cache.get(word, target, limit)
+        except KeyError:
+            groups[len(word)].append(i)
+    for length, indexes in groups.items():
+        group = [words[i] for i in indexes]
+        dists = _editdist_group(target, group, length, limit)
+        for i, x in zip(indexes, dists.tolist()):
+            results[i] = x
+            # Only keep hits, so a scan doesn't flush the cache.
+            if x != inf:
+                _ed_cache.set(words[i], target, limit, x)
+    return results
+
+
+@lru_cache(1)
+def _numpy():
+    """Import NumPy on first use.  Return None if it is not available."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _np_chars(words, length):
+    """Return code points of `words` as a NumPy array.
+
+    All words must have the given length.
+
+    """
+    numpy = _numpy()
+    buf = ''.join(words).encode('utf-32-le')
+    return numpy.frombuffer(buf, dtype=numpy.uint32).reshape(
+        len(words), length).astype(numpy.int64)
+
+
+@lru_cache(1)
+def _np_costs():
+    """Return the costs table as NumPy arrays.
+
+    Return a tuple (slots, table).  `slots` maps code points below 256
+    to table slots; other characters use the fallback slot.
+
+    """
+    numpy = _numpy()
+    table = numpy.array(costs.table, dtype=numpy.float64).reshape(
+        costs.size, costs.size)
+    slots = numpy.full(256, costs.fallback, dtype=numpy.int64)
+    for char, i in costs.slots.items():
+        slots[ord(char)] = i
+    return slots, table
+
+
+def _np_slots(chars):
+    """Map an array of code points to costs table slots."""
+    numpy = _numpy()
+    slots = _np_costs()[0]
+    return numpy.where(chars < len(slots),
+                       slots[numpy.minimum(chars, len(slots) - 1)],
+                       costs.fallback)
+
+
+def _editdist_group(target, words, length, limit):
+    """Vectorized :func:`editdist` for words of the same length.
+
+    Each row of the DP is computed for all words at once.  Insertions
+    along a row are resolved with a running minimum, so each row is a
+    fixed number of array operations.  Words are dropped from the
+    computation once their whole row exceeds `limit`.
+
+    """
+    numpy = _numpy()
+    inf = float('+inf')
+    table = _np_costs()[1]
+    n = len(target)
+    tchars = _np_chars([target], n)[0]
+    tslots = _np_slots(tchars)
+    chars = _np_chars(words, length)
+    wslots = _np_slots(chars)
+    steps = numpy.arange(n + 1, dtype=numpy.float64)
+    results = numpy.full(len(words), inf)
+    alive = numpy.arange(len(words))
+    prev2 = None
+    prev = numpy.tile(steps, (len(words), 1))
+    for i in range(1, length + 1):
+        cur = numpy.empty_like(prev)
+        cur[:, 0] = i
+        # replace or same
+        cur[:, 1:] = prev[:, :-1] + table[wslots[:, i-1, None], tslots]
+        # delete in a
+        numpy.minimum(cur, prev + 1, out=cur)
+        # transposition
+        if i >= 2 and n >= 2:
+            swap = ((chars[:, i-1, None] == tchars[None, :-1]) &
+                    (chars[:, i-2, None] == tchars[None, 1:]))
+            cur[:, 2:] = numpy.where(
+                swap, numpy.minimum(cur[:, 2:], prev2[:, :-2] + 1),
+                cur[:, 2:])
+        # insert in a
+        cur = numpy.minimum.accumulate(cur - steps, axis=1) + steps
+        if limit is not None:
+            keep = cur.min(axis=1) <= limit
+            if not keep.all():
+                alive = alive[keep]
+                cur = cur[keep]
+                prev = prev[keep]
+                chars = chars[keep]
+                wslots = wslots[keep]
+                if not len(alive):
+                    return results
+        prev2, prev = prev, cur
+    dists = prev[:, n]
+    if limit is not None:
+        dists = numpy.where(dists <= limit, dists, inf)
+    results[alive] = dists
+    return results
@@ -0,0 +1,162 @@
+"""
+Levenshtein automata, for finding candidate words in a trie.
+
+An automaton for a word and a maximum number of edits accepts exactly
+the strings within that many unit-cost edits (insertions, deletions,
+replacements and adjacent transpositions) of the word.  Intersecting it
+with a trie enumerates those words while only visiting trie nodes that
+can still lead to a match.
+
+"""
+
+import logging
+from bisect import insort
+
+from gzspell import analysis
+from gzspell import trie
+
+logger = logging.getLogger(__name__)
+
+
+class LevenshteinAutomaton:
+
+    """
+    Lazily built DFA accepting strings within `max_edits` of `word`.
+
+    A state is a pair of sparse tuples of (column, distance): the
+    current row of the edit distance DP, holding only the columns
+    within `max_edits`, and the transposition costs available to the
+    next character.  Transitions are cached, so stepping through a state
+    seen before is a dict lookup.
+
+    """
+
+    def __init__(self, word, max_edits):
+        self.word = word
+        self.max_edits = max_edits
+        self._transitions = {}
+
+    def start(self):
+        row = tuple((j, j) for j in range(min(len(self.word),
+                                              self.max_edits) + 1))
+        return (row, ())
+
+    def step(self, state, char):
+        """Return the state after reading char."""
+        key = (state, char)
+        try:
+            return self._transitions[key]
+        except KeyError:
+            pass
+        new = self._step(state, char)
+        self._transitions[key] = new
+        return new
+
+    def _step(self, state, char):
+        row, trans = state
+        word = self.word
+        n = len(word)
+        k = self.max_edits
+        old = dict(row)
+        trans = dict(trans)
+        columns = set(old)
+        columns.update(j + 1 for j in old if j < n)
+        columns.update(trans)
+        columns = sorted(columns)
+        cur = []
+        while columns:
+            j = columns.pop(0)
+            # delete
+            v = old.get(j, k) + 1
+            # replace or same
+            if j >= 1 and j - 1 in old:
+                v = min(v, old[j - 1] + (word[j - 1] != char))
+            # insert
+            if cur and cur[-1][0] == j - 1:
+                v = min(v, cur[-1][1] + 1)
+            # transposition
+            if j in trans and word[j - 2] == char:
+                v = min(v, trans[j])
+            if v <= k:
+                cur.append((j, v))
+                if v < k and j < n and j + 1 not in columns:
+                    insort(columns, j + 1)
+        new_trans = tuple(
+            (j + 2, v + 1) for j, v in row
+            if v < k and j + 2 <= n and word[j + 1] == char)
+        return (tuple(cur), new_trans)
+
+    def distance(self, state):
+        """Return the distance if the state accepts, or None."""
+        row = state[0]
+        if row and row[-1][0] == len(self.word):
+            return row[-1][1]
+        return None
+
+    @staticmethod
+    def can_match(state):
+        """Return whether any continuation can be accepted."""
+        return bool(state[0])
+
+    def intersect(self, t):
+        """Find the words in a trie.Trie accepted by the automaton.
+
+        Return a list of tuples: (value, word, unit distance).
+
+        """
+        found = []
+        state = self.start()
+        if t.root.end and self.distance(state) is not None:
+            found.append((t.root.value, '', self.distance(state)))
+        stack = [(rel.node, char + rel.chars, '', state)
+                 for char, rel in t.root.map.items()]
+        while stack:
+            node, chars, prefix, state = stack.pop()
+            for char in chars:
+                state = self.step(state, char)
+                if not self.can_match(state):
+                    break
+            else:
+                prefix += chars
+                if node.end:
+                    dist = self.distance(state)
+                    if dist is not None:
+                        found.append((node.value, prefix, dist))
+                for char, rel in node.map.items():
+                    stack.append((rel.node, char + rel.chars, prefix, state))
+        return found
+
+
+class AutomatonIndex:
+
+    """
+    Candidate index intersecting Levenshtein automata with a trie.
+
+    Candidates are the words within ``int(limit)`` unit-cost edits of
+    the target whose weighted :func:`analysis.editdist` is also within
+    the limit.
+
+    Recall is capped at ``int(limit)`` unit edits.  Substitutions of
+    nearby keys cost less than 1, so some words within the weighted
+    limit are more unit edits away and are never generated.  An
+    automaton sized for the cheapest edit would accept a large part of
+    the lexicon, which defeats the index.
+
+    """
+
+    def __init__(self):
+        self.trie = trie.Trie()
+
+    def add(self, word, id):
+        self.trie.add(word, id)
+
+    def search(self, word, limit):
+        automaton = LevenshteinAutomaton(word, int(limit))
+        found = automaton.intersect(self.trie)
+        logger.debug('%d words accepted', len(found))
+        results = []
+        for id, cand, unit_dist in found:
+            dist = analysis.editdist(cand, word, limit)
+            if dist <= limit:
+                results.append((id, cand, dist))
+        return results
@@ -0,0 +1,87 @@
+"""
+BK-tree candidate index over the weighted edit distance.
+
+Each child of a node is keyed on its distance to the node.  When
+searching for words within radius r of a target at distance d from a
+node, only children keyed between d - r and d + r can hold matches, by
+the triangle inequality.
+
+The restricted transposition distance used by :func:`analysis.editdist`
+does not satisfy the triangle inequality in every case (for example
+"ca", "ac" and "abc"), so a search can rarely miss a word that a full
+scan would find.
+
+"""
+
+import logging
+
+from gzspell import analysis
+
+logger = logging.getLogger(__name__)
+
+
+class Node:
+
+    __slots__ = ['word', 'id', 'children']
+
+    def __init__(self, word, id):
+        self.word = word
+        self.id = id
+        self.children = {}
+
+
+class BKTree:
+
+    """BK-tree keyed on analysis.editdist, supporting incremental add."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, word, id):
+        """Add a word.  If it is already present, its id is replaced."""
+        if self.root is None:
+            self.root = Node(word, id)
+            self.size += 1
+            return
+        node = self.root
+        while True:
+            if word == node.word:
+                node.id = id
+                return
+            dist = analysis.editdist(word, node.word)
+            try:
+                node = node.children[dist]
+            except KeyError:
+                node.children[dist] = Node(word, id)
+                self.size += 1
+                return
+
+    def search(self, word, radius):
+        """Find words within `radius` of `word`.
+
+        Return a list of tuples: (id, word, distance).
+
+        """
+        found = []
+        if self.root is None:
+            return found
+        visited = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            visited += 1
+            # Beyond this limit neither the node nor any child can match.
+            limit = radius + max(node.children, default=0)
+            dist = analysis.editdist(word, node.word, limit)
+            if dist <= radius:
+                found.append((node.id, node.word, dist))
+            low = dist - radius
+            high = dist + radius
+            stack.extend(child for key, child in node.children.items()
+                         if low <= key <= high)
+        logger.debug('Visited %d of %d nodes', visited, self.size)
+        return found
@@ -0,0 +1,161 @@
+"""
+Word graph in compressed sparse row (CSR) form.
+
+Nodes are positions 0..n-1 in a sorted array of word ids.  The
+neighbors of node i are ``indices[indptr[i]:indptr[i+1]]``, sorted, with
+optional edge distances in the parallel ``dists`` array.
+
+File format:
+
+Arrays are stored raw in native byte order after a header, so a file can
+be memory mapped and used without parsing::
+
+    magic     4 bytes, b'GZCS'
+    header    4 unsigned ints: version, number of nodes, number of
+              edges, whether distances are included
+    ids       uint32 * nodes
+    indptr    int32 * (nodes + 1)
+    indices   int32 * edges
+    dists     float32 * edges, if included
+
+"""
+
+import logging
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'GZCS'
+VERSION = 1
+_header = struct.Struct('=4I')
+
+
+class CSRGraph:
+
+    """
+    Read-only graph in CSR form.
+
+    The arrays may be array.array objects or memoryviews of a mapped
+    file; either way neighbor lookups are slices.
+
+    """
+
+    def __init__(self, ids, indptr, indices, dists=None):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.dists = dists
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def pos(self, id):
+        """Return the node position for a word id."""
+        i = bisect_left(self.ids, id)
+        if i == len(self.ids) or self.ids[i] != id:
+            raise KeyError(id)
+        return i
+
+    def neighbors(self, pos):
+        """Return the neighbor positions of a node."""
+        return self.indices[self.indptr[pos]:self.indptr[pos+1]]
+
+    def distances(self, pos):
+        """Return the stored edge distances for a node's neighbors."""
+        return self.dists[self.indptr[pos]:self.indptr[pos+1]]
+
+    def neighbor_ids(self, id):
+        """Return the ids of the neighbors of a word id."""
+        return [self.ids[x] for x in self.neighbors(self.pos(id))]
+
+    @classmethod
+    def from_edges(cls, ids, edges, dist=None):
+        """Build a graph from word ids and (id1, id2) edges.
+
+        Duplicate edges are dropped.  If `dist` is given, it is called
+        with each pair of node positions to get the edge distance.
+
+        """
+        ids = array('I', sorted(ids))
+        graph = cls(ids, None, None)
+        src = array('i')
+        dst = array('i')
+        for id1, id2 in edges:
+            src.append(graph.pos(id1))
+            dst.append(graph.pos(id2))
+        # counting sort by source
+        indptr = array('i', [0]) * (len(ids) + 1)
+        for x in src:
+            indptr[x + 1] += 1
+        for i in range(len(ids)):
+            indptr[i + 1] += indptr[i]
+        fill = array('i', indptr)
+        indices = array('i', [0]) * len(src)
+        for x, y in zip(src, dst):
+            indices[fill[x]] = y
+            fill[x] += 1
+        del src, dst, fill
+        # sort and dedupe each row
+        new_indptr = array('i', [0])
+        new_indices = array('i')
+        for i in range(len(ids)):
+            row = sorted(set(indices[indptr[i]:indptr[i+1]]))
+            new_indices.extend(row)
+            new_indptr.append(len(new_indices))
+        graph.indptr = new_indptr
+        graph.indices = new_indices
+        if dist is not None:
+            graph.dists = array('f', (
+                dist(i, j) for i in range(len(ids))
+                for j in graph.neighbors(i)))
+        logger.info('Built graph with %d nodes and %d edges',
+                    len(ids), len(new_indices))
+        return graph
+
+    def save(self, f):
+        """Write the graph to a binary file object."""
+        f.write(MAGIC)
+        f.write(_header.pack(VERSION, len(self.ids), len(self.indices),
+                             self.dists is not None))
+        for x, typecode in ((self.ids, 'I'), (self.indptr, 'i'),
+                            (self.indices, 'i'), (self.dists, 'f')):
+            if x is not None:
+                array(typecode, x).tofile(f)
+
+    @classmethod
+    def from_buffer(cls, buf, offset=0):
+        """Use a graph stored in a buffer at offset, without copying.
+
+        Return a tuple (graph, end offset).
+
+        """
+        view = memoryview(buf)
+        if bytes(view[offset:offset+len(MAGIC)]) != MAGIC:
+            raise ValueError('not a CSR graph')
+        offset += len(MAGIC)
+        version, nodes, edges, has_dists = _header.unpack_from(buf, offset)
+        if version != VERSION:
+            raise ValueError('unsupported graph version {}'.format(version))
+        offset += _header.size
+        arrays = []
+        for typecode, size in (('I', nodes), ('i', nodes + 1),
+                               ('i', edges), ('f', edges if has_dists else 0)):
+            end = offset + 4 * size
+            arrays.append(view[offset:end].cast(typecode))
+            offset = end
+        ids, indptr, indices, dists = arrays
+        return cls(ids, indptr, indices, dists if has_dists else None), offset
+
+    @classmethod
+    def load(cls, fname):
+        """Memory map a graph file."""
+        with open(fname, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(buf)[0]
@@ -0,0 +1,99 @@
+"""
+Reading lexicon and graph data files, and building candidate indexes
+from them.
+
+File formats:
+
+lexicon.dat
+-----------
+
+::
+
+    {"id": 1, "word": "apple", "frequency": 0.5, "length": 5}
+    {"id": 2, "word": "banana", "frequency": 0.5, "length": 6}
+
+graph.dat
+---------
+
+::
+
+    [1, 2]
+    [2, 1]
+
+"""
+
+import logging
+import json
+from collections.abc import Mapping
+from importlib import import_module
+
+logger = logging.getLogger(__name__)
+
+
+def lexicon_iter(fname):
+    """Yield tuples (id, word, frequency) from a lexicon file."""
+    with open(fname) as f:
+        for line in f:
+            x = json.loads(line)
+            yield x['id'], x['word'], x['frequency']
+
+
+def graph_iter(fname):
+    """Yield tuples (word1, word2) from a graph file."""
+    with open(fname) as f:
+        for line in f:
+            x = json.loads(line)
+            yield x[0], x[1]
+
+
+class _Indexes(Mapping):
+
+    """Mapping of index names to classes, importing each on first use."""
+
+    def __init__(self, paths):
+        self._paths = paths
+
+    def __getitem__(self, kind):
+        module, name = self._paths[kind]
+        return getattr(import_module('gzspell.' + module), name)
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+
+INDEXES = _Indexes({
+    'trie': ('trie', 'Trie'),
+    'automaton': ('automaton', 'AutomatonIndex'),
+    'symspell': ('symspell', 'SymSpellIndex'),
+    'bktree': ('bktree', 'BKTree'),
+    'ngram': ('ngram', 'NGramIndex'),
+})
+
+
+def build_index(kind, fname):
+    """Build a candidate index of the given kind from a lexicon file.
+
+    See INDEXES for the available kinds.
+
+    """
+    logger.info('Building %s index from %r', kind, fname)
+    index = INDEXES[kind]()
+    for id, word, freq in lexicon_iter(fname):
+        index.add(word, id)
+    if hasattr(index, 'freeze'):
+        index.freeze()
+    return index
+
+
+def load_index(kind, fname):
+    """Load a saved index of the given kind.
+
+    Only index kinds with a load() classmethod can be saved and loaded.
+
+    """
+    logger.info('Loading %s index from %r', kind, fname)
+    with open(fname, 'rb') as f:
+        return INDEXES[kind].load(f)
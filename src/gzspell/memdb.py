@@ -0,0 +1,289 @@
+"""
+In-memory lexicon store, usable in place of analysis.Database.
+
+The whole lexicon is held in compact arrays, and lookups are served
+without SQL:
+
+- word ids, sorted, in an array('I')
+- all words concatenated in one UTF-8 blob, with an offsets array
+- frequency counts in an array('f')
+- an open addressing hash table from word to position
+- (first character, length) buckets of positions for len_startswith
+- the graph, as a csr.CSRGraph over the same positions, with edges for
+  words added later kept in a dict
+
+Positions index the arrays; ids are only used at the interface.
+
+Writes are serialized with a lock.  Reads take no lock: a word is
+appended to every other array before its id is, and a grown hash table
+is filled before it replaces the old one, so readers only see complete
+words.
+
+The arrays may also be read-only views of a snapshot file (see the
+snapshot module).  They are copied into owned arrays the first time a
+word is added.
+
+"""
+
+import logging
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from gzspell import analysis
+from gzspell import csr
+from gzspell import lexicon
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(data):
+    return zlib.crc32(data)
+
+
+class MemoryDatabase:
+
+    """
+    Database backed by in-memory arrays.
+
+    Args:
+        words: iterable of (id, word, frequency count)
+        edges: iterable of (id1, id2) graph edges
+        backend: optional analysis.Database.  If given, writes are
+            also sent to it, and ids for new words are taken from it.
+        graph: optional csr.CSRGraph to use instead of building one from
+            `edges`.  Its ids must be the first ids of `words`.
+
+    """
+
+    def __init__(self, words, edges=(), backend=None, graph=None):
+        self.backend = backend
+        self._lock = threading.RLock()
+        self.ids = array('I')
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+        self.counts = array('f')
+        self.total = 0.0
+        self.buckets = defaultdict(lambda: array('I'))
+        for id, word, count in sorted(words):
+            self._append(id, word, count)
+        self._build_hash()
+        if graph is None:
+            graph = csr.CSRGraph.from_edges(self.ids, edges)
+        elif array('I', graph.ids) != self.ids[:len(graph)]:
+            raise ValueError('graph ids do not match words')
+        self.graph = graph
+        self.extra_edges = defaultdict(list)
+        self.frozen = False
+        logger.info('Loaded %d words', len(self.ids))
+
+    @classmethod
+    def from_arrays(cls, ids, offsets, blob, counts, total, table, buckets,
+                    graph, backend=None):
+        """Use prebuilt arrays, such as views of a snapshot, without copying.
+
+        `buckets` maps (first character, length) to sequences of
+        positions.
+
+        """
+        db = cls((), backend=backend)
+        db.ids = ids
+        db.offsets = offsets
+        db.blob = blob
+        db.counts = counts
+        db.total = total
+        db.table = table
+        db.buckets = buckets
+        db.graph = graph
+        db.frozen = True
+        return db
+
+    def _thaw(self):
+        """Copy views into owned arrays so that they can grow.
+
+        Called with the lock held.
+
+        """
+        if not self.frozen:
+            return
+        logger.debug('Copying %d words out of snapshot', len(self.ids))
+        self.ids = array('I', self.ids)
+        self.offsets = array('I', self.offsets)
+        self.blob = bytearray(self.blob)
+        self.counts = array('f', self.counts)
+        self.table = array('i', self.table)
+        buckets = defaultdict(lambda: array('I'))
+        for key, positions in self.buckets.items():
+            buckets[key] = array('I', positions)
+        self.buckets = buckets
+        self.frozen = False
+
+    @classmethod
+    def from_files(cls, lexicon_file, graph_file=None, backend=None):
+        """Load from lexicon and graph data files.
+
+        graph_file may be a graph.dat file or a CSR graph file.
+
+        """
+        edges, graph = (), None
+        if graph_file is not None:
+            with open(graph_file, 'rb') as f:
+                is_csr = f.read(len(csr.MAGIC)) == csr.MAGIC
+            if is_csr:
+                graph = csr.CSRGraph.load(graph_file)
+            else:
+                edges = lexicon.graph_iter(graph_file)
+        return cls(lexicon.lexicon_iter(lexicon_file), edges, backend, graph)
+
+    @classmethod
+    def from_database(cls, db, graph=None):
+        """Load everything from an analysis.Database.
+
+        Writes will go through to the database.  If a csr.CSRGraph is
+        given, the graph table is not read.
+
+        """
+        edges = db.all_edges() if graph is None else ()
+        return cls(db.all_words(), edges, db, graph)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _append(self, id, word, count):
+        if self.ids and id <= self.ids[-1]:
+            raise ValueError('ids must be unique and increasing')
+        pos = len(self.ids)
+        data = word.encode('utf8')
+        self.blob.extend(data)
+        self.offsets.append(len(self.blob))
+        self.counts.append(count)
+        self.total += count
+        # Publish the id last, after the rest of the word is in place.
+        self.ids.append(id)
+        if word:
+            self.buckets[word[0], len(word)].append(pos)
+        return pos
+
+    def _word_bytes(self, pos):
+        return self.blob[self.offsets[pos]:self.offsets[pos+1]]
+
+    def word(self, pos):
+        """Return the word at the given position."""
+        return str(self._word_bytes(pos), 'utf8')
+
+    def _pos(self, id):
+        i = bisect_left(self.ids, id)
+        if i == len(self.ids) or self.ids[i] != id:
+            raise KeyError(id)
+        return i
+
+    # Hash table
+
+    def _build_hash(self):
+        size = 8
+        while size < 2 * len(self.ids):
+            size *= 2
+        table = array('i', [-1]) * size
+        for pos in range(len(self.ids)):
+            self._hash_insert(pos, self._word_bytes(pos), table)
+        self.table = table
+
+    def _hash_insert(self, pos, data, table=None):
+        if table is None:
+            table = self.table
+        mask = len(table) - 1
+        i = _hash(data) & mask
+        while table[i] != -1:
+            i = (i + 1) & mask
+        table[i] = pos
+
+    def _lookup(self, word):
+        """Return the position of word, or -1."""
+        data = word.encode('utf8')
+        table = self.table
+        mask = len(table) - 1
+        i = _hash(data) & mask
+        while True:
+            pos = table[i]
+            if pos == -1 or self._word_bytes(pos) == data:
+                return pos
+            i = (i + 1) & mask
+
+    # Database interface
+
+    def hasword(self, word):
+        return self._lookup(word) != -1
+
+    def freq(self, id):
+        return self.counts[self._pos(id)] / self.total
+
+    def freq_many(self, ids):
+        return {id: self.freq(id) for id in ids}
+
+    def len_startswith(self, a, b, prefix):
+        if prefix:
+            keys = [(prefix[0], x) for x in range(a, b + 1)]
+        else:
+            keys = [k for k in self.buckets if a <= k[1] <= b]
+        found = []
+        for key in keys:
+            for pos in self.buckets.get(key, ()):
+                word = self.word(pos)
+                if word.startswith(prefix):
+                    found.append((self.ids[pos], word))
+        return found
+
+    def _neighbors(self, pos):
+        if pos < len(self.graph):
+            found = self.graph.neighbors(pos)
+            if pos in self.extra_edges:
+                found = list(found) + self.extra_edges[pos]
+            return found
+        return self.extra_edges.get(pos, ())
+
+    def neighbors(self, word_id):
+        return [(self.ids[pos], self.word(pos))
+                for pos in self._neighbors(self._pos(word_id))]
+
+    def neighbors_many(self, ids):
+        return {id: self.neighbors(id) for id in ids}
+
+    def add_word(self, word, freq):
+        with self._lock:
+            pos = self._lookup(word)
+            if pos != -1:
+                return self.ids[pos]
+            count = self.total * freq
+            self._thaw()
+            if self.backend is not None:
+                id = self.backend.add_word(word, freq)
+            else:
+                id = self.ids[-1] + 1 if self.ids else 1
+            pos = self._append(id, word, count)
+            if len(self.table) < 2 * len(self.ids):
+                self._build_hash()
+            else:
+                self._hash_insert(pos, self._word_bytes(pos))
+            wordlist = [(x, self.word(x)) for x in range(pos)]
+            for x in analysis.Database._gen_graph(word, wordlist):
+                self.extra_edges[pos].append(x)
+                self.extra_edges[x].append(pos)
+            return id
+
+    def add_freq(self, word, freq):
+        with self._lock:
+            pos = self._lookup(word)
+            if pos == -1:
+                return
+            self.counts[pos] += freq
+            self.total += freq
+            if self.backend is not None:
+                self.backend.add_freq(word, freq)
+
+    def invalidate(self):
+        pass
+
+    def balance_freq(self):
+        raise NotImplementedError
@@ -0,0 +1,94 @@
+"""
+Character n-gram candidate index.
+
+Words are indexed under the n-grams of the word padded with ``$`` at
+both ends, split by word length.  Candidates for a query are the words
+sharing the most n-grams with it among the lengths allowed by the
+length filter.
+
+"""
+
+import logging
+import heapq
+from array import array
+from collections import Counter
+
+from gzspell import analysis
+
+logger = logging.getLogger(__name__)
+
+
+def grams(word, n):
+    """Return the set of n-grams of the padded word."""
+    word = '$' + word + '$'
+    return {word[i:i+n] for i in range(max(len(word) - n + 1, 1))}
+
+
+class NGramIndex:
+
+    """
+    Inverted index from (n-gram, word length) to word positions.
+
+    Posting lists are array('I') of word positions.  Positions are
+    assigned in order, so the lists are sorted.
+
+    """
+
+    def __init__(self, n=2, length_err=2, top=50):
+        self.n = n
+        self.length_err = length_err
+        self.top_n = top
+        self.ids = array('I')
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def word(self, pos):
+        """Return the word at the given position."""
+        return self.blob[self.offsets[pos]:self.offsets[pos+1]].decode('utf8')
+
+    def add(self, word, id):
+        pos = len(self.ids)
+        self.ids.append(id)
+        self.blob.extend(word.encode('utf8'))
+        self.offsets.append(len(self.blob))
+        length = len(word)
+        for gram in grams(word, self.n):
+            try:
+                self.postings[gram, length].append(pos)
+            except KeyError:
+                self.postings[gram, length] = array('I', [pos])
+
+    def top(self, word, n=None):
+        """Return the words sharing the most n-grams with `word`.
+
+        Only words whose length is within length_err of the word's are
+        considered.  Return a list of tuples: (id, word, count).
+
+        """
+        if n is None:
+            n = self.top_n
+        length = len(word)
+        counts = Counter()
+        for gram in grams(word, self.n):
+            for x in range(length - self.length_err,
+                           length + self.length_err + 1):
+                try:
+                    counts.update(self.postings[gram, x])
+                except KeyError:
+                    pass
+        logger.debug('%d words share n-grams', len(counts))
+        return [(self.ids[pos], self.word(pos), count)
+                for pos, count in heapq.nlargest(
+                    n, counts.items(), key=lambda x: (x[1], -x[0]))]
+
+    def search(self, word, limit):
+        cands = self.top(word)
+        dists = analysis.editdist_many(
+            word, [cand for id, cand, count in cands], limit)
+        return [(id, cand, dist)
+                for (id, cand, count), dist in zip(cands, dists)
+                if dist <= limit]
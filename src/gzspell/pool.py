@@ -0,0 +1,179 @@
+"""
+Bounded pool of database connections.
+
+Connections are created on demand up to a maximum and reused after
+release.  A connection that has been idle for a while is checked with
+``ping(reconnect=True)`` before it is handed out, so connections closed
+by the server are replaced transparently.  When every connection is in
+use, callers wait for one to be released.
+
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection is released within the timeout."""
+
+
+class Pool:
+
+    """
+    Thread-safe bounded connection pool.
+
+    Args:
+        connect: function returning a new connection.  Connections must
+            have ``ping(reconnect)`` and ``close()`` methods, like
+            pymysql connections.
+        maxsize: maximum number of open connections
+        timeout: seconds to wait for a connection, or None to wait
+            forever
+        ping_after: ping connections that have been idle for at least
+            this many seconds before reuse
+
+    Attributes:
+        acquires: number of connections handed out
+        created: number of connections opened
+        discarded: number of connections closed after errors
+        reconnects: number of idle connections that failed a ping
+        waits: number of acquires that had to wait
+        wait_time: total seconds spent waiting
+        max_wait: longest wait in seconds
+        timeouts: number of acquires that timed out
+
+    """
+
+    def __init__(self, connect, maxsize=8, timeout=None, ping_after=1.0):
+        self.connect = connect
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.ping_after = ping_after
+        # Idle connections as (connection, time released), most recent
+        # last.
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self.acquires = 0
+        self.created = 0
+        self.discarded = 0
+        self.reconnects = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def __len__(self):
+        """Return the number of open connections."""
+        return self._size
+
+    def acquire(self):
+        """Return a connection, waiting if all are in use."""
+        with self._cond:
+            if not self._idle and self._size >= self.maxsize:
+                self._wait()
+            self.acquires += 1
+            if self._idle:
+                conn, released = self._idle.pop()
+            else:
+                conn = None
+                self._size += 1
+        try:
+            if conn is None:
+                conn = self.connect()
+                with self._cond:
+                    self.created += 1
+            elif time.monotonic() - released >= self.ping_after:
+                self._check(conn)
+        except Exception:
+            if conn is not None:
+                # An idle connection that could not be revived.
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _wait(self):
+        start = time.monotonic()
+        deadline = None if self.timeout is None else start + self.timeout
+        self.waits += 1
+        try:
+            while not self._idle and self._size >= self.maxsize:
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        'no connection within {}s'.format(self.timeout))
+                self._cond.wait(remaining)
+        finally:
+            waited = time.monotonic() - start
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def _check(self, conn):
+        try:
+            conn.ping(False)
+        except Exception:
+            logger.info('Reconnecting stale connection')
+            with self._cond:
+                self.reconnects += 1
+            conn.ping(True)
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool.
+
+        If `discard` is true, the connection is closed instead of
+        reused.
+
+        """
+        if discard:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            if discard:
+                self.discarded += 1
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, released in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """Return a dict of pool metrics."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'maxsize': self.maxsize,
+                'acquires': self.acquires,
+                'created': self.created,
+                'discarded': self.discarded,
+                'reconnects': self.reconnects,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'max_wait': self.max_wait,
+                'timeouts': self.timeouts,
+            }
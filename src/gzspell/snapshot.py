@@ -0,0 +1,171 @@
+"""
+Binary snapshot of a lexicon, its graph and candidate indexes.
+
+A snapshot holds the arrays of a :class:`memdb.MemoryDatabase` exactly
+as they are laid out in memory, so :func:`load` maps the file and wraps
+views of it without parsing.  Processes loading the same snapshot share
+its pages in the page cache.  The mapping is copy-on-write: frequency
+updates touch only private copies of the changed pages.
+
+Replace a snapshot in use by writing a new file and renaming it over
+the old one.  Truncating or rewriting a mapped file in place crashes
+the processes mapping it.
+
+File format:
+
+All integers are in native byte order and every section starts on a
+4 byte boundary::
+
+    magic     4 bytes, b'GZSN'
+    header    6 unsigned ints: version, number of words, size of word
+              blob, size of hash table, number of buckets, number of
+              bucketed positions; then a double: total frequency count
+    ids       uint32 * words, sorted
+    offsets   uint32 * (words + 1), word offsets into the blob
+    counts    float32 * words, frequency counts
+    table     int32 * table size, hash table of positions
+    buckets   (uint32 first character, uint32 length, uint32 start)
+              * buckets, sorted
+    order     uint32 * bucketed positions, grouped by bucket
+    blob      UTF-8 words, concatenated, padded to 4 bytes
+    graph     CSR graph (see the csr module)
+    indexes   uint32 count, then for each index: 16 byte name, uint32
+              size, the index as written by its save(), padded to 4
+              bytes
+
+Candidate indexes are read with their load(), which copies them.
+
+"""
+
+import io
+import logging
+import mmap
+import struct
+from array import array
+
+from gzspell import csr
+from gzspell import lexicon
+from gzspell import memdb
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'GZSN'
+VERSION = 1
+_header = struct.Struct('=6Id')
+_bucket = struct.Struct('=3I')
+_index = struct.Struct('=16sI')
+
+
+def _pad(f, size):
+    f.write(b'\0' * (-size % 4))
+
+
+def dump(f, db, indexes=None):
+    """Write a snapshot to a binary file object.
+
+    Args:
+        f: binary file object
+        db: memdb.MemoryDatabase
+        indexes: optional dict mapping lexicon.INDEXES names to indexes
+            that support save()
+
+    """
+    indexes = indexes or {}
+    buckets = sorted(db.buckets.items())
+    norder = sum(len(positions) for key, positions in buckets)
+    f.write(MAGIC)
+    f.write(_header.pack(VERSION, len(db.ids), len(db.blob), len(db.table),
+                         len(buckets), norder, db.total))
+    array('I', db.ids).tofile(f)
+    array('I', db.offsets).tofile(f)
+    array('f', db.counts).tofile(f)
+    array('i', db.table).tofile(f)
+    start = 0
+    for (char, length), positions in buckets:
+        f.write(_bucket.pack(ord(char), length, start))
+        start += len(positions)
+    for key, positions in buckets:
+        array('I', positions).tofile(f)
+    f.write(db.blob)
+    _pad(f, len(db.blob))
+    graph = db.graph
+    if db.extra_edges or len(graph) != len(db.ids):
+        # Fold in edges of words added since the graph was built.
+        graph = csr.CSRGraph.from_edges(db.ids, (
+            (db.ids[x], db.ids[y])
+            for x in range(len(db.ids)) for y in db._neighbors(x)))
+    graph.save(f)
+    f.write(struct.pack('=I', len(indexes)))
+    for kind, index in sorted(indexes.items()):
+        buf = io.BytesIO()
+        index.save(buf)
+        data = buf.getvalue()
+        f.write(_index.pack(kind.encode('ascii'), len(data)))
+        f.write(data)
+        _pad(f, len(data))
+
+
+def load(fname, backend=None):
+    """Map a snapshot file.
+
+    Return a tuple (memdb.MemoryDatabase, dict of indexes by name).
+
+    """
+    with open(fname, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return from_buffer(buf, backend)
+
+
+def from_buffer(buf, backend=None):
+    """Use a snapshot stored in a buffer without copying.
+
+    Return a tuple (memdb.MemoryDatabase, dict of indexes by name).
+
+    """
+    view = memoryview(buf)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError('not a snapshot')
+    offset = len(MAGIC)
+    (version, nwords, nblob, ntable, nbuckets, norder,
+     total) = _header.unpack_from(buf, offset)
+    if version != VERSION:
+        raise ValueError('unsupported snapshot version {}'.format(version))
+    offset += _header.size
+
+    def take(typecode, size, itemsize=4):
+        nonlocal offset
+        end = offset + itemsize * size
+        x = view[offset:end]
+        offset = end
+        return x.cast(typecode) if typecode != 'B' else x
+
+    ids = take('I', nwords)
+    offsets = take('I', nwords + 1)
+    counts = take('f', nwords)
+    table = take('i', ntable)
+    directory = [_bucket.unpack_from(buf, offset + i * _bucket.size)
+                 for i in range(nbuckets)]
+    offset += nbuckets * _bucket.size
+    order = take('I', norder)
+    blob = take('B', nblob, 1)
+    offset += -nblob % 4
+    buckets = {}
+    for i, (char, length, start) in enumerate(directory):
+        end = directory[i+1][2] if i + 1 < nbuckets else norder
+        buckets[chr(char), length] = order[start:end]
+    graph, offset = csr.CSRGraph.from_buffer(buf, offset)
+    db = memdb.MemoryDatabase.from_arrays(
+        ids, offsets, blob, counts, total, table, buckets, graph, backend)
+
+    indexes = {}
+    count, = struct.unpack_from('=I', buf, offset)
+    offset += 4
+    for i in range(count):
+        name, size = _index.unpack_from(buf, offset)
+        offset += _index.size
+        kind = name.rstrip(b'\0').decode('ascii')
+        indexes[kind] = lexicon.INDEXES[kind].load(
+            io.BytesIO(view[offset:offset+size]))
+        offset += size + -size % 4
+    logger.info('Loaded snapshot with %d words', nwords)
+    return db, indexes
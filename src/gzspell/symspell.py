@@ -0,0 +1,184 @@
+"""
+Symmetric delete candidate index.
+
+Every word is indexed under all the strings reachable from its prefix
+by up to `max_edits` deletions.  Two words within `max_edits` unit edits
+of each other share at least one of these strings, so looking up the
+deletions of a query finds every such word without scanning the
+lexicon.
+
+File format:
+
+The index is saved as a header followed by the raw arrays, in native
+byte order::
+
+    magic     4 bytes, b'GZSS'
+    header    7 unsigned ints: version, max_edits, prefix_length,
+              number of words, size of word blob, number of keys,
+              number of postings
+    ids       array('I'), word ids
+    offsets   array('I'), word offsets into the blob (words + 1)
+    blob      UTF-8 words, concatenated
+    keys      array('I'), sorted hashes of deletions
+    starts    array('I'), posting offsets for each key (keys + 1)
+    postings  array('I'), word positions
+
+"""
+
+import logging
+import struct
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from gzspell import analysis
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'GZSS'
+VERSION = 1
+_header = struct.Struct('=7I')
+
+
+def deletes(word, max_edits):
+    """Return the set of strings reachable by up to max_edits deletions."""
+    found = {word}
+    edits = {word}
+    for i in range(max_edits):
+        edits = {x[:j] + x[j+1:] for x in edits for j in range(len(x))}
+        found |= edits
+    return found
+
+
+def _hash(chars):
+    return zlib.crc32(chars.encode('utf8'))
+
+
+class SymSpellIndex:
+
+    """
+    Candidate index over the deletions of each word.
+
+    Words are stored compactly: ids in an array, words in one UTF-8 blob
+    with an offsets array, and postings as sorted arrays of word
+    positions keyed on 32-bit hashes of the deletions.  Hash collisions
+    only add candidates, which are then checked with
+    :func:`analysis.editdist`.
+
+    Words added with :meth:`add` are kept in a dict until
+    :meth:`freeze` merges them into the arrays.
+
+    Only words within `max_edits` unit edits of the query can be found,
+    so searches with a larger limit are refused.  By default the index
+    covers ``Spell.LOOKUP_THRESHOLD`` unit edits.  Words within the
+    weighted limit but more unit edits away, which are possible since
+    some edits cost less than 1, are not found.
+
+    """
+
+    def __init__(self, max_edits=None, prefix_length=7):
+        if max_edits is None:
+            max_edits = int(analysis.Spell.LOOKUP_THRESHOLD)
+        self.max_edits = max_edits
+        self.prefix_length = prefix_length
+        self.ids = array('I')
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+        self.keys = array('I')
+        self.starts = array('I', [0])
+        self.postings = array('I')
+        self.pending = defaultdict(list)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _hashes(self, word):
+        return {_hash(x) for x in deletes(word[:self.prefix_length],
+                                          self.max_edits)}
+
+    def word(self, pos):
+        """Return the word at the given position."""
+        return self.blob[self.offsets[pos]:self.offsets[pos+1]].decode('utf8')
+
+    def add(self, word, id):
+        pos = len(self.ids)
+        self.ids.append(id)
+        self.blob.extend(word.encode('utf8'))
+        self.offsets.append(len(self.blob))
+        for h in self._hashes(word):
+            self.pending[h].append(pos)
+
+    def freeze(self):
+        """Merge pending words into the posting arrays."""
+        if not self.pending:
+            return
+        logger.debug('Merging %d pending keys', len(self.pending))
+        postings = self.pending
+        for i, key in enumerate(self.keys):
+            postings[key][:0] = self.postings[
+                self.starts[i]:self.starts[i+1]]
+        self.keys = array('I', sorted(postings))
+        self.starts = array('I', [0])
+        self.postings = array('I')
+        for key in self.keys:
+            self.postings.extend(postings[key])
+            self.starts.append(len(self.postings))
+        self.pending = defaultdict(list)
+
+    def _lookup(self, h):
+        i = bisect_left(self.keys, h)
+        if i < len(self.keys) and self.keys[i] == h:
+            yield from self.postings[self.starts[i]:self.starts[i+1]]
+        yield from self.pending.get(h, ())
+
+    def search(self, word, limit):
+        if int(limit) > self.max_edits:
+            raise ValueError(
+                'limit {} exceeds the {} edits the index was built for'
+                .format(limit, self.max_edits))
+        positions = set()
+        for h in self._hashes(word):
+            positions.update(self._lookup(h))
+        logger.debug('%d positions found', len(positions))
+        found = []
+        for pos in positions:
+            cand = self.word(pos)
+            dist = analysis.editdist(cand, word, limit)
+            if dist <= limit:
+                found.append((self.ids[pos], cand, dist))
+        return found
+
+    def save(self, f):
+        """Write the index to a binary file object."""
+        self.freeze()
+        f.write(MAGIC)
+        f.write(_header.pack(
+            VERSION, self.max_edits, self.prefix_length, len(self.ids),
+            len(self.blob), len(self.keys), len(self.postings)))
+        self.ids.tofile(f)
+        self.offsets.tofile(f)
+        f.write(self.blob)
+        self.keys.tofile(f)
+        self.starts.tofile(f)
+        self.postings.tofile(f)
+
+    @classmethod
+    def load(cls, f):
+        """Read an index from a binary file object."""
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('not a symspell index')
+        (version, max_edits, prefix_length, nwords, nblob, nkeys,
+         npostings) = _header.unpack(f.read(_header.size))
+        if version != VERSION:
+            raise ValueError('unsupported index version {}'.format(version))
+        index = cls(max_edits, prefix_length)
+        index.ids.fromfile(f, nwords)
+        index.offsets = array('I')
+        index.offsets.fromfile(f, nwords + 1)
+        index.blob = bytearray(f.read(nblob))
+        index.keys.fromfile(f, nkeys)
+        index.starts = array('I')
+        index.starts.fromfile(f, nkeys + 1)
+        index.postings.fromfile(f, npostings)
+        return index
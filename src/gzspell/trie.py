@@ -1,6 +1,8 @@
 from collections import namedtuple
 import logging
 
+from gzspell import analysis
+
 logger = logging.getLogger(__name__)
 
 Relation = namedtuple('Relation', ['node', 'chars'])
@@ -73,7 +75,8 @@ class Trie:
         self.root = Node()
         logger.debug('initial node %r', self.root)
 
-    def add(self, word):
+    def add(self, word, value=None):
+        """Add word to the trie, storing `value` with it."""
         logger.debug('add(%r)', word)
         word = word.lower()
         node = self.root
@@ -100,7 +103,7 @@ class Trie:
                     new_node[rel.chars[match]] = Relation(
                         rel.node, rel.chars[match+1:])
                     node = new_node
-                    word = word[match+1:]
+                    word = word[match:]
             else:
                 # if key doesn't exist
                 logger.debug('mapping %r with rel chars %r', char, word)
@@ -111,15 +114,75 @@ class Trie:
                 break
         logger.debug('marking %r as end', node)
         node.end = True
+        node.value = value
+
+    def search(self, word, limit):
+        """Find words within `limit` edit distance of `word`.
+
+        The trie is walked depth first, computing one row of the edit
+        distance DP per trie character, so words sharing a prefix share
+        the rows for it.  Subtrees are pruned once every cell of the
+        row exceeds `limit`.
+
+        Return a list of tuples: (value, word, distance).
+
+        """
+        logger.debug('search(%r, %r)', word, limit)
+        costs = analysis.costs
+        table = costs.table
+        size = costs.size
+        slots = costs.encode(word)
+        chars = word
+        n = len(word)
+        found = []
+        row = list(range(n + 1))
+        if self.root.end and row[n] <= limit:
+            found.append((self.root.value, '', row[n]))
+        # stack of (node, relation chars left, prefix, prev2, prev)
+        stack = [(rel.node, char + rel.chars, '', None, row)
+                 for char, rel in self.root.map.items()]
+        while stack:
+            node, rel_chars, prefix, prev2, prev = stack.pop()
+            for char in rel_chars:
+                i = len(prefix) + 1
+                base = costs.slot(char) * size
+                last = prefix[-1] if prefix else None
+                cur = [i] + [0] * n
+                for j in range(1, n + 1):
+                    # replace or same
+                    x = prev[j - 1] + table[base + slots[j - 1]]
+                    # insert, delete
+                    y = min(cur[j - 1], prev[j]) + 1
+                    if y < x:
+                        x = y
+                    # transposition
+                    if (j >= 2 and last is not None and
+                            char == chars[j - 2] and last == chars[j - 1]):
+                        y = prev2[j - 2] + 1
+                        if y < x:
+                            x = y
+                    cur[j] = x
+                prefix += char
+                prev2, prev = prev, cur
+                if min(cur) > limit:
+                    break
+            else:
+                if node.end and prev[n] <= limit:
+                    found.append((node.value, prefix, prev[n]))
+                for char, rel in node.map.items():
+                    stack.append(
+                        (rel.node, char + rel.chars, prefix, prev2, prev))
+        return found
 
 
 class Node:
 
-    __slots__ = ['map', 'end']
+    __slots__ = ['map', 'end', 'value']
 
     def __init__(self):
         self.map = {}
         self.end = False
+        self.value = None
 
     def __getitem__(self, key):
         return self.map[key]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark CHECK latency against a MySQL lexicon database.
+
+Times :meth:`analysis.Database.hasword` for a sample of words in the
+lexicon and misspellings of them, and :meth:`Database.len_startswith`
+as used by corrections, and shows the access plan MySQL picks for each
+query.  Run it before and after ``migrate_schema`` to compare::
+
+    $ python tests/bench_check.py --user lexicon --passwd passwd
+
+"""
+
+import sys
+import os
+import argparse
+import random
+import statistics
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'src'), os.path.join(ROOT, 'files')]
+
+from gzspell import analysis
+
+
+def timings(func, args):
+    times = []
+    for x in args:
+        start = time.perf_counter()
+        func(*x)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return '{:8.3f} {:8.3f} {:8.3f}'.format(
+        statistics.median(times), times[int(len(times) * 0.95)],
+        statistics.mean(times))
+
+
+def explain(db, query, args):
+    with db._cursor() as cur:
+        cur.execute('EXPLAIN ' + query, args)
+        names = [x[0] for x in cur.description]
+        row = dict(zip(names, cur.fetchone()))
+    return 'type={} key={} rows={}'.format(
+        row['type'], row['key'], row['rows'])
+
+
+def main(*args):
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--db', default='lexicon')
+    parser.add_argument('--user', default='lexicon')
+    parser.add_argument('--passwd', default='')
+    parser.add_argument('--words', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(args)
+
+    db = analysis.Database(
+        host=args.host, db=args.db, user=args.user, passwd=args.passwd)
+    rand = random.Random(args.seed)
+    words = rand.sample([word for id, word, freq in db.all_words() if word],
+                        args.words)
+    wrong = []
+    for word in words:
+        i = rand.randrange(len(word))
+        wrong.append(word[:i] + word[i+1:] + rand.choice('aeiou'))
+
+    with db._cursor() as cur:
+        cur.execute("SHOW COLUMNS FROM words LIKE 'first_char'")
+        migrated = cur.fetchone() is not None
+    print('schema:', 'migrated' if migrated else 'original')
+    # Database.len_startswith needs the migrated schema, so time the
+    # query that matches the schema directly.
+    if migrated:
+        startswith = ' '.join((
+            'SELECT id, word FROM words WHERE first_char=%s',
+            'AND length BETWEEN %s AND %s AND word LIKE %s'))
+        startswith_args = [(x[0], len(x) - 2, len(x) + 2, x[0] + '%')
+                           for x in wrong]
+    else:
+        startswith = ' '.join((
+            'SELECT id, word FROM words WHERE length BETWEEN %s AND %s',
+            'AND word LIKE %s'))
+        startswith_args = [(len(x) - 2, len(x) + 2, x[0] + '%')
+                           for x in wrong]
+
+    def len_startswith(*query_args):
+        with db._cursor() as cur:
+            cur.execute(startswith, query_args)
+            return cur.fetchall()
+
+    print('{:24} {:>8} {:>8} {:>8}  (ms)'.format(
+        '', 'median', 'p95', 'mean'))
+    print('{:24} {}'.format('check (found)', timings(
+        db.hasword, [(x,) for x in words])))
+    print('{:24} {}'.format('check (not found)', timings(
+        db.hasword, [(x,) for x in wrong])))
+    print('{:24} {}'.format('len_startswith', timings(
+        len_startswith, startswith_args)))
+    print('hasword plan:', explain(
+        db, 'SELECT id FROM words WHERE word=%s', words[0]))
+    print('len_startswith plan:', explain(
+        db, startswith, startswith_args[0]))
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
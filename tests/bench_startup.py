@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark startup time of the gzspell scripts.
+
+Each script is run with ``--help``, which imports everything the script
+needs and exits before connecting to a database.  The time for a bare
+interpreter is reported separately and subtracted.
+
+Usage::
+
+    $ python tests/bench_startup.py --runs 20 --max-ms 100
+
+With ``--max-ms``, exits with status 1 if any script takes longer than
+that (after subtracting interpreter startup), so it can be run as a
+regression check.
+
+"""
+
+import sys
+import os
+import argparse
+import subprocess
+import time
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ['gzcli', 'gzserver']
+
+
+def run_time(args, env, runs):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        subprocess.check_call(args, env=env, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main(*args):
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args(args)
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        x for x in [os.path.join(ROOT, 'src'), os.path.join(ROOT, 'files'),
+                    env.get('PYTHONPATH')] if x)
+
+    base = run_time([sys.executable, '-c', 'pass'], env, args.runs)
+    print('python: {:.1f} ms'.format(base))
+    failed = False
+    for script in SCRIPTS:
+        path = os.path.join(ROOT, 'src', 'bin', script)
+        ms = run_time([sys.executable, path, '--help'], env, args.runs) - base
+        print('{}: {:.1f} ms'.format(script, ms))
+        if args.max_ms is not None and ms > args.max_ms:
+            failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,354 @@
+import unittest
+import logging
+import random
+import subprocess
+import sys
+from functools import lru_cache
+
+from gzspell import analysis
+
+logger = logging.getLogger(__name__)
+
+
+def ref_editdist(a, b):
+    """Plain recursive edit distance, used as a reference."""
+
+    @lru_cache(None)
+    def r(i, j):
+        if not i and not j:
+            return 0
+        possible = []
+        if j >= 1:
+            possible.append(r(i, j - 1) + 1)
+        if i >= 1:
+            possible.append(r(i - 1, j) + 1)
+        if i >= 1 and j >= 1:
+            possible.append(
+                r(i - 1, j - 1) + analysis.costs.repl_cost(a[i-1], b[j-1]))
+        if (i >= 2 and j >= 2 and a[i-1] == b[j-2] and a[i-2] == b[j-1]):
+            possible.append(r(i - 2, j - 2) + 1)
+        return min(possible)
+
+    return r(len(a), len(b))
+
+
+def ref_unit_editdist(a, b):
+    """Unit-cost edit distance with adjacent transpositions."""
+    m, n = len(a), len(b)
+    d = [[i + j if not i or not j else 0 for j in range(n + 1)]
+         for i in range(m + 1)]
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            d[i][j] = min(d[i-1][j] + 1, d[i][j-1] + 1,
+                          d[i-1][j-1] + (a[i-1] != b[j-1]))
+            if i >= 2 and j >= 2 and a[i-1] == b[j-2] and a[i-2] == b[j-1]:
+                d[i][j] = min(d[i][j], d[i-2][j-2] + 1)
+    return d[m][n]
+
+
+class WordsDatabase:
+
+    """Minimal database over an in-memory list of words, for testing."""
+
+    def __init__(self, words, freqs=None):
+        self.words = list(enumerate(words, 1))
+        self.freqs = freqs or {}
+
+    def hasword(self, word):
+        return any(word == x for id, x in self.words)
+
+    def freq(self, id):
+        return self.freqs.get(id, 0)
+
+    def freq_many(self, ids):
+        return {id: self.freq(id) for id in ids}
+
+    def len_startswith(self, a, b, prefix):
+        return [(id, x) for id, x in self.words
+                if a <= len(x) <= b and x.startswith(prefix)]
+
+    def neighbors(self, word_id):
+        word = dict(self.words)[word_id]
+        return [(id, x) for id, x in self.words
+                if id != word_id and
+                analysis.editdist(word, x) < analysis.GRAPH_THRESHOLD]
+
+    def neighbors_many(self, ids):
+        return {id: self.neighbors(id) for id in ids}
+
+
+def random_word(rand, alphabet='abcdeqwsz', low=0, high=8):
+    return ''.join(rand.choice(alphabet)
+                   for i in range(rand.randint(low, high)))
+
+
+class TestCosts(unittest.TestCase):
+
+    def test_repl_cost(self):
+        costs = analysis.costs
+        self.assertEqual(costs.repl_cost('a', 'a'), 0)
+        self.assertEqual(costs.repl_cost('a', 's'), 0.5)
+        self.assertEqual(costs.repl_cost('q', 'p'), 4.0)
+        self.assertEqual(costs.repl_cost('a', 'A'), costs.UNKNOWN_COST)
+        self.assertEqual(costs.repl_cost('A', 'A'), costs.UNKNOWN_COST)
+        for a in costs.keys:
+            for b in costs.keys:
+                self.assertEqual(costs.repl_cost(a, b), costs.repl_cost(b, a))
+
+    def test_encode(self):
+        costs = analysis.costs
+        self.assertEqual(costs.encode('qA'), [0, costs.fallback])
+        self.assertRaises(ValueError, costs.get, 'A', 'a')
+
+
+class TestEditdist(unittest.TestCase):
+
+    def test_simple(self):
+        self.assertEqual(analysis.editdist('apple', 'apple'), 0)
+        self.assertEqual(analysis.editdist('apple', 'appel'), 1)
+        self.assertEqual(analysis.editdist('apple', 'aple'), 1)
+        self.assertEqual(analysis.editdist('', 'abc'), 3)
+        self.assertEqual(analysis.editdist('apple', 'applw'), 0.5)
+
+    def test_limit(self):
+        self.assertEqual(analysis.editdist('apple', 'banana', 2),
+                         float('+inf'))
+        self.assertEqual(analysis.editdist('apple', 'appel', 1), 1)
+        self.assertEqual(analysis.editdist('apple', 'ap', 2), float('+inf'))
+
+    def test_long(self):
+        a = 'a' * 5000
+        self.assertEqual(analysis.editdist(a, a + 'b', 2), 1)
+        self.assertEqual(analysis.editdist(a, 'b' + a + 'b', 1),
+                         float('+inf'))
+
+    def test_reference(self):
+        rand = random.Random(0)
+        for i in range(300):
+            a = random_word(rand)
+            b = random_word(rand)
+            expected = ref_editdist(a, b)
+            self.assertEqual(analysis.editdist(a, b), expected)
+            for limit in (0.5, 1, 2, 3):
+                x = analysis.editdist(a, b, limit)
+                if expected <= limit:
+                    self.assertEqual(x, expected)
+                else:
+                    self.assertEqual(x, float('+inf'))
+
+
+class TestUnitEditdist(unittest.TestCase):
+
+    def test_simple(self):
+        self.assertEqual(analysis.unit_editdist('apple', 'apple'), 0)
+        self.assertEqual(analysis.unit_editdist('apple', 'appel'), 1)
+        self.assertEqual(analysis.unit_editdist('', 'abc'), 3)
+        self.assertEqual(analysis.unit_editdist('abc', ''), 3)
+        a = 'x' * 100
+        self.assertEqual(analysis.unit_editdist(a + 'ab', a + 'ba'), 1)
+
+    def test_reference(self):
+        rand = random.Random(0)
+        for i in range(1000):
+            a = random_word(rand, 'abc')
+            b = random_word(rand, 'abc')
+            expected = ref_unit_editdist(a, b)
+            self.assertEqual(analysis.unit_editdist(a, b), expected)
+            for limit in range(4):
+                x = analysis.unit_editdist(a, b, limit)
+                if expected <= limit:
+                    self.assertEqual(x, expected)
+                else:
+                    self.assertGreater(x, limit)
+
+    def test_lower_bound(self):
+        rand = random.Random(1)
+        for i in range(300):
+            a = random_word(rand)
+            b = random_word(rand)
+            self.assertLessEqual(analysis.unit_editdist(a, b) / 2,
+                                 analysis.editdist(a, b))
+
+
+class TestEditdistMany(unittest.TestCase):
+
+    def check(self, target, words, limit):
+        expected = [ref_editdist(word, target) for word in words]
+        if limit is not None:
+            expected = [x if x <= limit else float('+inf') for x in expected]
+        self.assertEqual(
+            analysis.editdist_many(target, words, limit), expected)
+
+    def test_simple(self):
+        words = ['apple', 'appel', 'aple', 'banana', '', 'applw', 'APPLE']
+        for limit in (None, 0, 1, 3):
+            self.check('apple', words, limit)
+        self.assertEqual(analysis.editdist_many('apple', []), [])
+
+    def test_random(self):
+        rand = random.Random(2)
+        words = [random_word(rand, 'abcdeqwsz-A') for i in range(500)]
+        for i in range(20):
+            target = random_word(rand, 'abcdeqwsz-A')
+            for limit in (None, 1, 2.5):
+                self.check(target, words, limit)
+
+    def test_fallback(self):
+        _numpy = analysis._numpy
+        analysis._numpy = lambda: None
+        try:
+            self.check('apple', ['apple', 'appel', 'banana'], 2)
+        finally:
+            analysis._numpy = _numpy
+
+    def test_gen_graph_chunks(self):
+        words = ['apple', 'appel', 'banana', 'aple', 'pear']
+        chunk = analysis.GRAPH_CHUNK
+        analysis.GRAPH_CHUNK = 2
+        try:
+            found = analysis.Database._gen_graph(
+                'apple', iter(enumerate(words)))
+            self.assertEqual(list(found), [0, 1, 3])
+        finally:
+            analysis.GRAPH_CHUNK = chunk
+
+
+class TestSpell(unittest.TestCase):
+
+    def setUp(self):
+        self.spell = analysis.Spell(WordsDatabase(
+            ['apple', 'apply', 'ample', 'banana', 'bandana', 'cherry'],
+            {1: 0.5}))
+
+    def test_check(self):
+        self.assertEqual(self.spell.check('apple'), 'OK')
+        self.assertEqual(self.spell.check('appel'), 'ERROR')
+
+    def test_correct(self):
+        self.assertEqual(self.spell.correct('appel'), 'apple')
+        self.assertEqual(self.spell.correct('banan'), 'banana')
+        self.assertEqual(self.spell.correct('cheery'), 'cherry')
+        self.assertIsNone(self.spell.correct('zzzzzz'))
+
+    def test_explore(self):
+        spell = analysis.Spell(WordsDatabase(['apple', 'xapple', 'banana']))
+        found = sorted(x[1] for x in spell._search('appel'))
+        self.assertEqual(found, ['apple', 'xapple'])
+        spell.MAX_EXPANSIONS = 0
+        found = sorted(x[1] for x in spell._search('appel'))
+        self.assertEqual(found, ['apple'])
+
+    def test_explore_batch(self):
+        db = WordsDatabase(['apple', 'xapple', 'xxapple', 'bapple', 'banana'])
+        calls = []
+        neighbors_many = db.neighbors_many
+        db.neighbors_many = lambda ids: (
+            calls.append(ids) or neighbors_many(ids))
+        spell = analysis.Spell(db)
+        found = sorted(x[1] for x in spell._search('appel'))
+        self.assertEqual(found, ['apple', 'bapple', 'xapple', 'xxapple'])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0], [1])
+        self.assertEqual(sorted(calls[1]), [2, 3, 4])
+
+    def test_process(self):
+        self.assertEqual(self.spell.process('apple'), 'OK')
+        self.assertEqual(self.spell.process('aple'), 'WRONG apple')
+
+
+class TestCache(unittest.TestCase):
+
+    def test_canonical(self):
+        cache = analysis.Cache()
+        cache.set('b', 'a', 1, 0.5)
+        self.assertEqual(cache.get('a', 'b', 1), 0.5)
+        self.assertEqual(cache.get('b', 'a', 1), 0.5)
+        self.assertRaises(KeyError, cache.get, 'a', 'c', 1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    def test_limits(self):
+        inf = float('+inf')
+        cache = analysis.Cache()
+        cache.set('a', 'b', None, 2)
+        self.assertEqual(cache.get('a', 'b', None), 2)
+        self.assertEqual(cache.get('a', 'b', 3), 2)
+        self.assertEqual(cache.get('a', 'b', 1), inf)
+        cache.set('a', 'c', 2, inf)
+        self.assertEqual(cache.get('a', 'c', 1), inf)
+        self.assertEqual(cache.get('a', 'c', 2), inf)
+        self.assertRaises(KeyError, cache.get, 'a', 'c', 3)
+        self.assertRaises(KeyError, cache.get, 'a', 'c', None)
+        # weaker results don't replace stronger ones
+        cache.set('a', 'c', 1, inf)
+        self.assertEqual(cache.get('a', 'c', 2), inf)
+        cache.set('a', 'b', 1, inf)
+        self.assertEqual(cache.get('a', 'b', None), 2)
+        cache.set('a', 'c', None, 5)
+        self.assertEqual(cache.get('a', 'c', None), 5)
+        self.assertEqual(len(cache), 2)
+
+    def test_evict(self):
+        cache = analysis.Cache(maxsize=2)
+        cache.set('a', 'b', None, 1)
+        cache.set('a', 'c', None, 2)
+        cache.get('a', 'b', None)
+        cache.set('a', 'd', None, 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertRaises(KeyError, cache.get, 'a', 'c', None)
+        self.assertEqual(cache.get('a', 'b', None), 1)
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('a', 'b', None), 1)
+
+    def test_maxbytes(self):
+        cache = analysis.Cache(maxsize=None, maxbytes=10000)
+        for i in range(1000):
+            cache.set(str(i), 'x', None, i)
+        self.assertLessEqual(cache.bytes, 10000)
+        self.assertEqual(cache.evictions, 1000 - len(cache))
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], len(cache))
+        cache.clear()
+        self.assertEqual(cache.bytes, 0)
+
+    def test_symmetric(self):
+        rand = random.Random(3)
+        for i in range(200):
+            a = random_word(rand, 'qwertyuiopasdfghjklzxcvbnm')
+            b = random_word(rand, 'qwertyuiopasdfghjklzxcvbnm')
+            self.assertEqual(ref_editdist(a, b), ref_editdist(b, a))
+
+
+class TestImport(unittest.TestCase):
+
+    def test_lazy(self):
+        # Importing analysis shouldn't load heavy modules or compute costs.
+        code = '; '.join((
+            'import sys',
+            'from gzspell import analysis',
+            'print(analysis.costs._table is None)',
+            'print("pymysql" in sys.modules)',
+            'print("numpy" in sys.modules)',
+        ))
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         universal_newlines=True)
+        self.assertEqual(output.split(), ['True', 'False', 'False'])
+
+    def test_lazy_indexes(self):
+        # The server imports lexicon for the index names only.
+        code = '; '.join((
+            'import sys',
+            'from gzspell import lexicon',
+            'print(sorted(lexicon.INDEXES) == sorted(["trie", "automaton",'
+            ' "symspell", "bktree", "ngram"]))',
+            'print([m for m in ("gzspell.symspell", "gzspell.memdb",'
+            ' "gzspell.csr") if m in sys.modules])',
+            'print(lexicon.INDEXES["symspell"].__name__)',
+        ))
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         universal_newlines=True)
+        self.assertEqual(output.split('\n')[:3],
+                         ['True', '[]', 'SymSpellIndex'])
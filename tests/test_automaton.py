@@ -0,0 +1,57 @@
+import unittest
+import logging
+import random
+
+from gzspell import automaton
+
+from test_analysis import ref_unit_editdist
+from test_analysis import random_word
+
+logger = logging.getLogger(__name__)
+
+
+class TestAutomaton(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.words = sorted({random_word(rand, 'abcd', 0, 7)
+                             for i in range(500)})
+        self.index = automaton.AutomatonIndex()
+        for i, word in enumerate(self.words):
+            self.index.add(word, i)
+
+    def test_intersect(self):
+        rand = random.Random(1)
+        for i in range(30):
+            target = random_word(rand, 'abcd', 0, 7)
+            for k in range(4):
+                a = automaton.LevenshteinAutomaton(target, k)
+                expected = []
+                for id, word in enumerate(self.words):
+                    dist = ref_unit_editdist(word, target)
+                    if dist <= k:
+                        expected.append((id, word, dist))
+                self.assertEqual(sorted(a.intersect(self.index.trie)),
+                                 expected)
+
+    def test_search(self):
+        target = self.words[100]
+        found = self.index.search(target, 1)
+        self.assertIn((100, target, 0), found)
+        for id, word, dist in found:
+            self.assertLessEqual(ref_unit_editdist(word, target), 1)
+
+    def test_weighted_limit(self):
+        index = automaton.AutomatonIndex()
+        index.add('ppp', 1)
+        index.add('qqp', 2)
+        # 'ppp' is 3 unit edits from 'qqq' but further when weighted.
+        self.assertEqual(index.search('qqq', 3), [(2, 'qqp', 2.0)])
+
+    def test_unit_cap(self):
+        index = automaton.AutomatonIndex()
+        index.add('qaz', 1)
+        index.add('wsz', 2)
+        # 'qaz' is within the weighted limit but 3 unit edits away, past
+        # the documented cap of int(limit) unit edits.
+        self.assertEqual(index.search('wsx', 1.5), [(2, 'wsz', 0.5)])
@@ -0,0 +1,60 @@
+import unittest
+import logging
+import random
+
+from gzspell import analysis
+from gzspell import bktree
+
+from test_analysis import random_word
+
+logger = logging.getLogger(__name__)
+
+
+class TestBKTree(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.words = sorted({random_word(rand, 'qwertyasdfgh', 1, 8)
+                             for i in range(400)})
+        self.tree = bktree.BKTree()
+        for i, word in enumerate(self.words):
+            self.tree.add(word, i)
+
+    def test_add(self):
+        self.assertEqual(len(self.tree), len(self.words))
+        self.tree.add(self.words[0], 1000)
+        self.assertEqual(len(self.tree), len(self.words))
+        self.assertIn((1000, self.words[0], 0),
+                      self.tree.search(self.words[0], 0))
+
+    def test_search(self):
+        rand = random.Random(1)
+        missed = 0
+        for i in range(50):
+            target = random_word(rand, 'qwertyasdfgh', 1, 8)
+            found = self.tree.search(target, 2)
+            expected = set()
+            for id, word in enumerate(self.words):
+                dist = analysis.editdist(word, target)
+                if dist <= 2:
+                    expected.add((id, word, dist))
+            self.assertLessEqual(set(found), expected)
+            missed += len(expected - set(found))
+        # transpositions may rarely break the triangle inequality
+        self.assertLess(missed, 5)
+
+    def test_empty(self):
+        self.assertEqual(bktree.BKTree().search('apple', 3), [])
+
+    def test_spell_add(self):
+
+        class Database:
+            def hasword(self, word):
+                return False
+
+            def add_word(self, word, freq):
+                return 1000
+
+        spell = analysis.Spell(Database(), self.tree)
+        spell.add('zzzz')
+        self.assertEqual(self.tree.search('zzzz', 0), [(1000, 'zzzz', 0)])
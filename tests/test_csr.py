@@ -0,0 +1,53 @@
+import unittest
+import logging
+import os
+import tempfile
+
+from gzspell import csr
+
+logger = logging.getLogger(__name__)
+
+
+class TestCSRGraph(unittest.TestCase):
+
+    ids = [9, 3, 5, 7, 8]
+    edges = [(3, 5), (5, 3), (3, 7), (7, 3), (8, 9), (9, 8), (3, 5)]
+
+    def setUp(self):
+        self.graph = csr.CSRGraph.from_edges(
+            self.ids, self.edges, lambda i, j: i + j)
+
+    def check(self, graph):
+        self.assertEqual(len(graph), 5)
+        self.assertEqual(graph.edge_count, 6)
+        self.assertEqual(list(graph.ids), [3, 5, 7, 8, 9])
+        self.assertEqual(list(graph.neighbors(0)), [1, 2])
+        self.assertEqual(list(graph.distances(0)), [1, 2])
+        self.assertEqual(graph.neighbor_ids(3), [5, 7])
+        self.assertEqual(graph.neighbor_ids(9), [8])
+        self.assertEqual(list(graph.neighbors(graph.pos(8))), [4])
+        self.assertRaises(KeyError, graph.pos, 4)
+
+    def test_build(self):
+        self.check(self.graph)
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'graph.csr')
+            with open(fname, 'wb') as f:
+                self.graph.save(f)
+            graph = csr.CSRGraph.load(fname)
+            self.check(graph)
+            self.assertIsInstance(graph.indices, memoryview)
+
+    def test_no_dists(self):
+        graph = csr.CSRGraph.from_edges(self.ids, self.edges)
+        self.assertIsNone(graph.dists)
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'graph.csr')
+            with open(fname, 'wb') as f:
+                graph.save(f)
+            self.assertIsNone(csr.CSRGraph.load(fname).dists)
+
+    def test_bad_file(self):
+        self.assertRaises(ValueError, csr.CSRGraph.from_buffer, b'junk' * 8)
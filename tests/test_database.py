@@ -0,0 +1,150 @@
+import unittest
+import logging
+
+from test_pool import Connection
+
+logger = logging.getLogger(__name__)
+
+
+class Words:
+
+    """In-memory words table answering the queries of analysis.Database."""
+
+    def __init__(self, words):
+        self.words = {id: [word, count] for id, word, count in words}
+        self.queries = []
+
+    def count(self, prefix):
+        """Return how many queries run so far start with prefix."""
+        return sum(1 for x in self.queries if x.startswith(prefix))
+
+    def execute(self, query, args):
+        self.queries.append(query)
+        words = self.words
+        if query.startswith('SELECT id, frequency FROM words WHERE id IN'):
+            return [(id, words[id][1]) for id in sorted(set(args))
+                    if id in words]
+        if query.startswith('SELECT sum(frequency)'):
+            return [(sum(x[1] for x in words.values()),)]
+        if query.startswith('SELECT id, frequency FROM words WHERE word'):
+            return [(id, x[1]) for id, x in words.items() if x[0] == args]
+        if query.startswith('SELECT id FROM words WHERE word'):
+            return [(id,) for id, x in words.items() if x[0] == args]
+        if query.startswith('SELECT id, word FROM words'):
+            return [(id, x[0].encode('utf8')) for id, x in words.items()]
+        if query.startswith('SELECT LAST_INSERT_ID()'):
+            return [(max(words),)]
+        if query.startswith('UPDATE words SET frequency'):
+            freq, word = args
+            found = [x for x in words.values() if x[0] == word]
+            for x in found:
+                x[1] += freq
+            return len(found)
+        if query.startswith('INSERT IGNORE INTO words'):
+            word, first_char, length, count = args
+            if any(x[0] == word for x in words.values()):
+                return 0
+            words[max(words) + 1] = [word, count]
+            return 1
+        if query.startswith('INSERT IGNORE INTO graph'):
+            return 0
+        raise AssertionError('unexpected query {!r}'.format(query))
+
+
+class Cursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, query, args=None):
+        result = self.connection.table.execute(query, args)
+        if isinstance(result, int):
+            self.rows = []
+            return result
+        self.rows = result
+        return len(result)
+
+    def executemany(self, query, args):
+        for x in args:
+            self.execute(query, x)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+
+class TableConnection(Connection):
+
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def cursor(self, cursorclass=None):
+        return Cursor(self)
+
+    def __enter__(self):
+        return Cursor(self)
+
+    def __exit__(self, *exc):
+        pass
+
+
+class TestFrequencyCache(unittest.TestCase):
+
+    def setUp(self):
+        from gzspell import analysis
+        self.table = Words([(1, 'apple', 4), (2, 'banana', 6)])
+        self.db = analysis.Database(pool_size=1)
+        self.db._pool.connect = lambda: TableConnection(self.table)
+
+    def test_cached(self):
+        self.assertEqual(self.db.freq(1), 0.4)
+        self.assertEqual(self.db.freq(1), 0.4)
+        self.assertEqual(self.db.freq_many([1, 2]), {1: 0.4, 2: 0.6})
+        self.assertEqual(self.db.freq_many([2, 1]), {1: 0.4, 2: 0.6})
+        # One query for id 1, one for id 2, and the total once.
+        self.assertEqual(self.table.count('SELECT id, frequency'), 2)
+        self.assertEqual(self.table.count('SELECT sum'), 1)
+
+    def test_add_freq(self):
+        self.db.freq_many([1, 2])
+        self.db.add_freq('apple', 5)
+        self.db.add_freq('cherry', 5)
+        self.assertEqual(self.db.freq_many([1, 2]), {1: 0.6, 2: 0.4})
+        self.assertEqual(self.table.count('SELECT sum'), 1)
+        self.assertEqual(self.table.count('SELECT id, frequency FROM words '
+                                          'WHERE id IN'), 1)
+
+    def test_add_word(self):
+        self.db.freq_many([1, 2])
+        id = self.db.add_word('applf', 0.25)
+        self.assertEqual(id, 3)
+        self.assertEqual(self.table.words[3], ['applf', 2.5])
+        self.assertEqual(self.db.freq_many([1, 3]), {1: 4 / 12.5,
+                                                     3: 2.5 / 12.5})
+        self.assertEqual(self.table.count('SELECT sum'), 1)
+        self.assertEqual(self.table.count('SELECT id, frequency FROM words '
+                                          'WHERE id IN'), 1)
+        # Adding an existing word changes nothing.
+        self.assertEqual(self.db.add_word('apple', 0.5), 1)
+        self.assertEqual(self.db.freq(1), 4 / 12.5)
+
+    def test_invalidate(self):
+        self.assertEqual(self.db.freq(1), 0.4)
+        # A write from another process.
+        self.table.words[1][1] = 14
+        self.assertEqual(self.db.freq(1), 0.4)
+        self.db.invalidate()
+        self.assertEqual(self.db.freq(1), 0.7)
+        self.assertEqual(self.table.count('SELECT sum'), 2)
+        self.assertEqual(self.table.count('SELECT id, frequency'), 2)
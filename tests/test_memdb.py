@@ -0,0 +1,165 @@
+import unittest
+import logging
+import os
+import json
+import threading
+import time
+import tempfile
+
+from gzspell import analysis
+from gzspell import csr
+from gzspell import memdb
+
+logger = logging.getLogger(__name__)
+
+
+class TestMemoryDatabase(unittest.TestCase):
+
+    words = [(3, 'apple', 4), (5, 'apply', 2), (7, 'ample', 1),
+             (8, 'banana', 3), (9, 'bandana', 0)]
+    edges = [(3, 5), (5, 3), (3, 7), (7, 3), (8, 9), (9, 8)]
+
+    def setUp(self):
+        self.db = memdb.MemoryDatabase(self.words, self.edges)
+
+    def test_hasword(self):
+        for id, word, count in self.words:
+            self.assertTrue(self.db.hasword(word))
+        self.assertFalse(self.db.hasword('appel'))
+        self.assertFalse(self.db.hasword(''))
+
+    def test_freq(self):
+        self.assertEqual(self.db.freq(3), 0.4)
+        self.assertEqual(self.db.freq_many([5, 8]), {5: 0.2, 8: 0.3})
+        self.assertRaises(KeyError, self.db.freq, 4)
+
+    def test_len_startswith(self):
+        self.assertEqual(sorted(self.db.len_startswith(4, 6, 'a')),
+                         [(3, 'apple'), (5, 'apply'), (7, 'ample')])
+        self.assertEqual(self.db.len_startswith(6, 6, 'b'), [(8, 'banana')])
+        self.assertEqual(self.db.len_startswith(5, 5, 'ap'),
+                         [(3, 'apple'), (5, 'apply')])
+        self.assertEqual(self.db.len_startswith(1, 3, 'a'), [])
+
+    def test_neighbors(self):
+        self.assertEqual(self.db.neighbors(3), [(5, 'apply'), (7, 'ample')])
+        self.assertEqual(self.db.neighbors(9), [(8, 'banana')])
+
+    def test_add(self):
+        id = self.db.add_word('appel', 0.1)
+        self.assertEqual(id, 10)
+        self.assertTrue(self.db.hasword('appel'))
+        self.assertIn((10, 'appel'), self.db.neighbors(3))
+        self.assertIn((3, 'apple'), self.db.neighbors(10))
+        self.assertEqual(self.db.add_word('appel', 0.1), 10)
+        self.db.add_freq('appel', 1)
+        self.assertAlmostEqual(self.db.freq(10), 2 / 12)
+        # grow the hash table
+        for i in range(20):
+            self.db.add_word('x' * (i + 1), 0)
+        for i in range(20):
+            self.assertTrue(self.db.hasword('x' * (i + 1)))
+
+    def test_concurrent_add(self):
+
+        class SlowDatabase(memdb.MemoryDatabase):
+            # Widen the window between choosing an id and storing it.
+            def _append(self, *args):
+                time.sleep(0.001)
+                return super()._append(*args)
+
+        db = SlowDatabase(self.words, self.edges)
+        words = ['w{}'.format(i) for i in range(40)]
+        ids = {}
+        errors = []
+        done = threading.Event()
+
+        def add(words):
+            try:
+                for word in words:
+                    ids.setdefault(word, set()).add(db.add_word(word, 0.01))
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                while not done.is_set():
+                    for id in list(db.ids):
+                        db.freq(id)
+                        db.neighbors(id)
+                    db.hasword('w10')
+            except Exception as e:
+                errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        # Each word is added by two threads.
+        threads = [threading.Thread(target=add, args=(words[i % 4::4],))
+                   for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(db), len(self.words) + len(words))
+        self.assertTrue(all(len(x) == 1 for x in ids.values()))
+        self.assertEqual(len({x for id in ids.values() for x in id}),
+                         len(words))
+        for word in words:
+            self.assertTrue(db.hasword(word))
+
+    def test_spell(self):
+        spell = analysis.Spell(self.db)
+        self.assertEqual(spell.process('apple'), 'OK')
+        self.assertEqual(spell.process('aple'), 'WRONG apple')
+
+    def test_spell_add(self):
+        from gzspell import symspell
+        index = symspell.SymSpellIndex()
+        for id, word, count in self.words:
+            index.add(word, id)
+        spell = analysis.Spell(self.db, index)
+        spell.add('apple')
+        spell.update('apple')
+        spell.add('appel')
+        spell.add('appel')
+        found = sorted(x[1] for x in index.search('appel', 1))
+        self.assertEqual(found, ['appel', 'apple'])
+        self.assertEqual(len(index.ids), len(self.words) + 1)
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            lexicon = os.path.join(tmp, 'lexicon.dat')
+            graph = os.path.join(tmp, 'graph.dat')
+            with open(lexicon, 'w') as f:
+                for id, word, count in self.words:
+                    f.write(json.dumps({'id': id, 'word': word,
+                                        'frequency': count,
+                                        'length': len(word)}) + '\n')
+            with open(graph, 'w') as f:
+                for edge in self.edges:
+                    f.write(json.dumps(edge) + '\n')
+            db = memdb.MemoryDatabase.from_files(lexicon, graph)
+        self.assertEqual(db.neighbors(3), self.db.neighbors(3))
+        self.assertEqual(len(db), len(self.words))
+
+    def test_csr_file(self):
+        graph = csr.CSRGraph.from_edges([3, 5, 7, 8, 9], self.edges)
+        with tempfile.TemporaryDirectory() as tmp:
+            lexicon = os.path.join(tmp, 'lexicon.dat')
+            fname = os.path.join(tmp, 'graph.csr')
+            with open(lexicon, 'w') as f:
+                for id, word, count in self.words:
+                    f.write(json.dumps({'id': id, 'word': word,
+                                        'frequency': count,
+                                        'length': len(word)}) + '\n')
+            with open(fname, 'wb') as f:
+                graph.save(f)
+            db = memdb.MemoryDatabase.from_files(lexicon, fname)
+            self.assertEqual(db.neighbors(3), self.db.neighbors(3))
+            db.add_word('appel', 0.1)
+            self.assertIn((10, 'appel'), db.neighbors(3))
+        self.assertRaises(ValueError, memdb.MemoryDatabase,
+                          self.words[1:], graph=graph)
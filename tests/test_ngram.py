@@ -0,0 +1,35 @@
+import unittest
+import logging
+
+from gzspell import ngram
+
+logger = logging.getLogger(__name__)
+
+
+class TestNGram(unittest.TestCase):
+
+    words = ['apple', 'apply', 'ample', 'maple', 'banana', 'bandana',
+             'app', 'applesauce']
+
+    def setUp(self):
+        self.index = ngram.NGramIndex(top=3)
+        for i, word in enumerate(self.words):
+            self.index.add(word, i)
+
+    def test_grams(self):
+        self.assertEqual(ngram.grams('ab', 2), {'$a', 'ab', 'b$'})
+        self.assertEqual(ngram.grams('', 3), {'$$'})
+
+    def test_top(self):
+        top = self.index.top('appel')
+        self.assertEqual(len(top), 3)
+        self.assertEqual(top[0][:2], (0, 'apple'))
+        self.assertEqual(top[0][2], 3)
+        # length filter
+        self.assertNotIn('applesauce', [x[1] for x in
+                                        self.index.top('apple', 10)])
+
+    def test_search(self):
+        found = self.index.search('banan', 3)
+        self.assertEqual(sorted(x[1] for x in found), ['banana', 'bandana'])
+        self.assertEqual(self.index.search('zzzzz', 3), [])
@@ -0,0 +1,162 @@
+import unittest
+import logging
+import threading
+
+from gzspell import pool
+
+logger = logging.getLogger(__name__)
+
+
+class Connection:
+
+    def __init__(self):
+        self.alive = True
+        self.dead = False
+        self.closed = False
+        self.reconnects = 0
+
+    def ping(self, reconnect):
+        if self.dead:
+            raise OSError('unreachable')
+        if not self.alive:
+            if not reconnect:
+                raise OSError('gone')
+            self.alive = True
+            self.reconnects += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = pool.Pool(Connection, maxsize=2, timeout=0.05,
+                              ping_after=0)
+
+    def test_reuse(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        self.assertIs(self.pool.acquire(), conn)
+        stats = self.pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['acquires'], 2)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_reconnect(self):
+        conn = self.pool.acquire()
+        conn.alive = False
+        self.pool.release(conn)
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(conn.reconnects, 1)
+        self.assertEqual(self.pool.stats()['reconnects'], 1)
+
+    def test_discard(self):
+        conn = self.pool.acquire()
+        self.pool.release(conn, discard=True)
+        self.assertTrue(conn.closed)
+        self.assertEqual(len(self.pool), 0)
+        self.assertIsNot(self.pool.acquire(), conn)
+
+    def test_timeout(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        self.assertRaises(pool.PoolTimeout, self.pool.acquire)
+        stats = self.pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_time'], 0)
+
+    def test_wait(self):
+        self.pool.timeout = None
+        conns = [self.pool.acquire(), self.pool.acquire()]
+        got = []
+        thread = threading.Thread(target=lambda: got.append(
+            self.pool.acquire()))
+        thread.start()
+        self.pool.release(conns[0])
+        thread.join(1)
+        self.assertEqual(got, conns[:1])
+        self.assertEqual(self.pool.stats()['created'], 2)
+
+    def test_connect_error(self):
+        def connect():
+            raise OSError('refused')
+        p = pool.Pool(connect, maxsize=1)
+        self.assertRaises(OSError, p.acquire)
+        self.assertRaises(OSError, p.acquire)
+        self.assertEqual(len(p), 0)
+
+
+class TestDatabase(unittest.TestCase):
+
+    class Cursor:
+
+        def __init__(self, error=None):
+            self.error = error
+
+        def execute(self, query, args=None):
+            if self.error:
+                raise self.error
+            return 1
+
+        def fetchone(self):
+            return (1,)
+
+    class Connection(Connection):
+
+        error = None
+
+        def __enter__(self):
+            return TestDatabase.Cursor(self.error)
+
+        def __exit__(self, *exc):
+            pass
+
+    def setUp(self):
+        from gzspell import analysis
+        import pymysql
+        self.pymysql = pymysql
+        self.db = analysis.Database(pool_size=1)
+        self.conns = []
+        self.db._pool.connect = self.connect
+
+    def connect(self):
+        conn = self.Connection()
+        self.conns.append(conn)
+        return conn
+
+    def test_reuse(self):
+        self.assertTrue(self.db.hasword('apple'))
+        self.assertTrue(self.db.hasword('apple'))
+        stats = self.db.pool_stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['idle'], 1)
+
+    def test_broken(self):
+        self.Connection.error = self.pymysql.OperationalError()
+        try:
+            self.assertRaises(self.pymysql.OperationalError,
+                              self.db.hasword, 'apple')
+        finally:
+            self.Connection.error = None
+        self.assertEqual(self.db.pool_stats()['discarded'], 1)
+        self.assertTrue(self.conns[0].closed)
+        self.assertTrue(self.db.hasword('apple'))
+        # An idle connection that can't reconnect is closed too.
+        self.db._pool.ping_after = 0
+        self.conns[1].dead = True
+        self.assertRaises(OSError, self.db.hasword, 'apple')
+        self.assertTrue(self.conns[1].closed)
+        self.assertEqual(len(self.db._pool), 0)
+        self.assertTrue(self.db.hasword('apple'))
+
+    def test_error(self):
+        self.Connection.error = self.pymysql.ProgrammingError()
+        try:
+            self.assertRaises(self.pymysql.ProgrammingError,
+                              self.db.hasword, 'apple')
+        finally:
+            self.Connection.error = None
+        self.assertEqual(self.db.pool_stats()['discarded'], 0)
+        self.assertEqual(self.db.pool_stats()['idle'], 1)
@@ -0,0 +1,73 @@
+import unittest
+import logging
+import os
+import tempfile
+
+from gzspell import analysis
+from gzspell import memdb
+from gzspell import snapshot
+from gzspell import symspell
+
+logger = logging.getLogger(__name__)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    words = [(3, 'apple', 4), (5, 'apply', 2), (7, 'ample', 1),
+             (8, 'banana', 3), (9, 'bandana', 0), (10, '', 0)]
+    edges = [(3, 5), (5, 3), (3, 7), (7, 3), (8, 9), (9, 8)]
+
+    def setUp(self):
+        self.db = memdb.MemoryDatabase(self.words, self.edges)
+        self.index = symspell.SymSpellIndex()
+        for id, word, count in self.words:
+            self.index.add(word, id)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def dump(self, db, indexes=None, name='lexicon.snap'):
+        fname = os.path.join(self.tmp.name, name)
+        with open(fname, 'wb') as f:
+            snapshot.dump(f, db, indexes)
+        return snapshot.load(fname)
+
+    def check(self, db):
+        for id, word, count in self.words:
+            self.assertTrue(db.hasword(word))
+            self.assertEqual(db.freq(id), self.db.freq(id))
+            self.assertEqual(db.neighbors(id), self.db.neighbors(id))
+        self.assertFalse(db.hasword('appel'))
+        for a, b, prefix in [(4, 6, 'a'), (6, 7, 'b'), (5, 5, 'ap')]:
+            self.assertEqual(db.len_startswith(a, b, prefix),
+                             self.db.len_startswith(a, b, prefix))
+
+    def test_load(self):
+        db, indexes = self.dump(self.db, {'symspell': self.index})
+        self.assertIsInstance(db.ids, memoryview)
+        self.check(db)
+        self.assertEqual(sorted(indexes['symspell'].search('aple', 2)),
+                         sorted(self.index.search('aple', 2)))
+        spell = analysis.Spell(db, indexes['symspell'])
+        self.assertEqual(spell.process('aple'), 'WRONG apple')
+
+    def test_write(self):
+        db, indexes = self.dump(self.db)
+        self.assertEqual(indexes, {})
+        db.add_freq('apple', 10)
+        self.assertAlmostEqual(db.freq(3), 14 / 20)
+        id = db.add_word('appel', 0.1)
+        self.assertEqual(id, 11)
+        self.assertIn((11, 'appel'), db.neighbors(3))
+        self.assertEqual(db.len_startswith(5, 5, 'appe'), [(11, 'appel')])
+        # The file is not changed.
+        self.check(snapshot.load(
+            os.path.join(self.tmp.name, 'lexicon.snap'))[0])
+        again, indexes = self.dump(db, name='again.snap')
+        self.assertTrue(again.hasword('appel'))
+        self.assertEqual(again.neighbors(11), db.neighbors(11))
+        self.assertAlmostEqual(again.freq(3), db.freq(3))
+
+    def test_bad_file(self):
+        self.assertRaises(ValueError, snapshot.from_buffer, b'junk' * 16)
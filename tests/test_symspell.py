@@ -0,0 +1,92 @@
+import unittest
+import logging
+import random
+import io
+import os
+import json
+import tempfile
+
+from gzspell import analysis
+from gzspell import lexicon
+from gzspell import symspell
+
+from test_analysis import ref_unit_editdist
+from test_analysis import random_word
+
+logger = logging.getLogger(__name__)
+
+
+class TestSymSpell(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(0)
+        self.words = sorted({random_word(rand, 'abcdqw', 1, 9)
+                             for i in range(500)})
+        self.index = symspell.SymSpellIndex(3, 7)
+        for i, word in enumerate(self.words):
+            self.index.add(word, i + 100)
+
+    def test_deletes(self):
+        self.assertEqual(symspell.deletes('abc', 1),
+                         {'abc', 'ab', 'ac', 'bc'})
+        self.assertEqual(len(symspell.deletes('abc', 3)), 8)
+
+    def check(self, index):
+        rand = random.Random(1)
+        for i in range(50):
+            target = random_word(rand, 'abcdqw', 1, 9)
+            found = index.search(target, 3)
+            for id, word, dist in found:
+                self.assertEqual(self.words[id - 100], word)
+                self.assertEqual(dist, analysis.editdist(word, target))
+                self.assertLessEqual(dist, 3)
+            # everything within max_edits unit edits must be found
+            found = {word for id, word, dist in found}
+            for word in self.words:
+                if (ref_unit_editdist(word, target) <= 3 and
+                        analysis.editdist(word, target) <= 3):
+                    self.assertIn(word, found)
+
+    def test_limit(self):
+        self.assertEqual(symspell.SymSpellIndex().max_edits,
+                         analysis.Spell.LOOKUP_THRESHOLD)
+        self.assertRaises(ValueError, symspell.SymSpellIndex(2).search,
+                          'apple', 3)
+
+    def test_search(self):
+        self.check(self.index)
+        self.index.freeze()
+        self.assertFalse(self.index.pending)
+        self.check(self.index)
+
+    def test_save(self):
+        f = io.BytesIO()
+        self.index.save(f)
+        f.seek(0)
+        index = symspell.SymSpellIndex.load(f)
+        self.assertEqual(len(index), len(self.words))
+        self.assertEqual(index.word(3), self.words[3])
+        self.check(index)
+        self.assertRaises(ValueError, symspell.SymSpellIndex.load,
+                          io.BytesIO(b'nope'))
+
+    def test_add_after_load(self):
+        f = io.BytesIO()
+        self.index.save(f)
+        f.seek(0)
+        index = symspell.SymSpellIndex.load(f)
+        index.add('qqqqqq', 1)
+        self.assertIn((1, 'qqqqqq', 0), index.search('qqqqqq', 3))
+        index.freeze()
+        self.assertIn((1, 'qqqqqq', 0), index.search('qqqqqq', 3))
+
+    def test_build_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fname = os.path.join(tmp, 'lexicon.dat')
+            with open(fname, 'w') as f:
+                for i, word in enumerate(self.words):
+                    f.write(json.dumps({'id': i + 100, 'word': word,
+                                        'frequency': 1}) + '\n')
+            index = lexicon.build_index('symspell', fname)
+        self.assertFalse(index.pending)
+        self.check(index)
@@ -1,6 +1,7 @@
 import unittest
 import logging
 
+from gzspell import analysis
 from gzspell import trie
 
 logger = logging.getLogger(__name__)
@@ -65,3 +66,49 @@ class TestTrie(unittest.TestCase):
         self.check(t, True, False)
         t.traverse('ha')
         self.check(t, True, False)
+
+    def test_split(self):
+
+        x = trie.Trie()
+        x.add('apple')
+        x.add('apply')
+
+        t = trie.Traverser(x)
+        t.traverse('apply')
+        self.check(t, False, True)
+
+        t = trie.Traverser(x)
+        t.traverse('appl')
+        self.check(t, False, False)
+
+
+class TestSearch(unittest.TestCase):
+
+    words = ['apple', 'apply', 'app', 'ample', 'banana', 'bandana', 'b']
+
+    def setUp(self):
+        self.trie = trie.Trie()
+        for i, word in enumerate(self.words):
+            self.trie.add(word, i)
+
+    def test_search(self):
+        for target in ['appel', 'ap', 'banan', 'bx', 'zzz', '']:
+            for limit in (0, 1, 2, 3):
+                expected = []
+                for i, word in enumerate(self.words):
+                    dist = analysis.editdist(word, target)
+                    if dist <= limit:
+                        expected.append((i, word, dist))
+                self.assertEqual(sorted(self.trie.search(target, limit)),
+                                 sorted(expected))
+
+    def test_correct(self):
+
+        class Database:
+            def freq_many(self, ids):
+                return dict.fromkeys(ids, 0)
+
+        spell = analysis.Spell(Database(), self.trie)
+        self.assertEqual(spell.correct('appel'), 'apple')
+        self.assertEqual(spell.correct('bandanna'), 'bandana')
+        self.assertIsNone(spell.correct('zzzzzzz'))